@@ -0,0 +1,196 @@
+import inspect
+
+import numpy as np
+
+#####################################################
+#
+# Block-processing graph
+#
+#    Nodes are added by name with the names of the nodes that feed them.
+#    compile() sorts the graph once (Kahn's algorithm) and allocates one
+#    block buffer per node; after that process() only copies into those
+#    buffers, so the graph itself allocates nothing per block.
+#
+#    A node may be:
+#      - the graph input, fed by process(block)
+#      - a source with no inputs: anything with process(n_samples) (e.g.
+#        WavetableOscillator, OscillatorBank), an iterator of blocks (e.g.
+#        util_waveforms.wv_blocks) or a callable fn(n_samples); sources whose
+#        process() takes out= render straight into the node's buffer
+#      - a processor: anything with process(block) (filters, DcBlocker,
+#        Biquad, ParametricEQ, Compressor, LookaheadLimiter, ...) or a
+#        callable fn(block); processors whose process() takes out= write
+#        straight into the node's buffer
+#      - a mix: processor None, the sum of its inputs
+#    A node with several inputs gets their sum; a node read by several nodes
+#    is computed once (fan-out costs nothing).
+#
+#####################################################
+
+INPUT = 'input'
+
+
+class AudioGraph:
+    """
+    Fixed block size, fixed channel count processing graph. Buffers are
+    (block_size,) for mono and (channels, block_size) otherwise; process()
+    returns the output node's buffer, which the next call overwrites.
+    """
+    def __init__(self, block_size=64, channels=1):
+        self.block_size = block_size
+        self.channels = channels
+        self.nodes = {}
+        self.order = None
+        self.output = None
+        self._buffers = {}
+
+    def __str__(self):
+        return f"block_size = {self.block_size}, channels = {self.channels}, nodes = {self.order or list(self.nodes)}"
+
+    def add_input(self, name=INPUT):
+        """ the node process(block) feeds """
+        return self._add(name, _Input(), [])
+
+    def add_source(self, name, source):
+        """ a node that generates block_size samples per block """
+        return self._add(name, _Source(source), [])
+
+    def add(self, name, processor, inputs):
+        """ a node running processor on the sum of inputs (processor None: just the sum) """
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        if not inputs:
+            raise ValueError(f"node '{name}' needs at least one input; use add_source for generators")
+        return self._add(name, _Processor(processor), list(inputs))
+
+    def set_output(self, name):
+        if name not in self.nodes:
+            raise KeyError(f"no node named '{name}'")
+        self.output = name
+
+    def compile(self):
+        """ sort the nodes and allocate every buffer; called by the first process() """
+        if not self.nodes:
+            raise ValueError("graph has no nodes")
+        for name, node in self.nodes.items():
+            missing = [i for i in node.inputs if i not in self.nodes]
+            if missing:
+                raise KeyError(f"node '{name}' reads from unknown nodes {missing}")
+
+        readers = {name: [] for name in self.nodes}
+        waiting = {name: len(node.inputs) for name, node in self.nodes.items()}
+        for name, node in self.nodes.items():
+            for source in node.inputs:
+                readers[source].append(name)
+
+        ready = [name for name, count in waiting.items() if count == 0]
+        order = []
+        while ready:
+            name = ready.pop(0)
+            order.append(name)
+            for reader in readers[name]:
+                waiting[reader] -= 1
+                if waiting[reader] == 0:
+                    ready.append(reader)
+        if len(order) != len(self.nodes):
+            raise ValueError(f"graph has a cycle through {sorted(set(self.nodes) - set(order))}")
+
+        shape = (self.block_size,) if self.channels == 1 else (self.channels, self.block_size)
+        self._buffers = {name: np.zeros(shape) for name in order}
+        for name in order:
+            node = self.nodes[name]
+            node.bind(self._buffers[name], [self._buffers[i] for i in node.inputs])
+        self.order = order
+        if self.output is None:
+            self.output = order[-1]
+        return self
+
+    def process(self, block=None):
+        """ run one block through the graph; block feeds the input node, if there is one """
+        if self.order is None:
+            self.compile()
+        for name in self.order:
+            node = self.nodes[name]
+            if isinstance(node, _Input):
+                np.copyto(node.buffer, block)
+            else:
+                node.run()
+        return self._buffers[self.output]
+
+    def buffer(self, name):
+        """ the block a node produced on the last process() """
+        return self._buffers[name]
+
+    def _add(self, name, node, inputs):
+        if name in self.nodes:
+            raise ValueError(f"a node named '{name}' already exists")
+        node.inputs = inputs
+        self.nodes[name] = node
+        self.order = None
+        return name
+
+
+class _Node:
+    inputs = ()
+
+    def bind(self, buffer, input_buffers):
+        self.buffer = buffer
+        self.input_buffers = input_buffers
+
+
+class _Input(_Node):
+    pass
+
+
+class _Source(_Node):
+    def __init__(self, source):
+        self._writes_out = False
+        if hasattr(source, 'process'):
+            self._next = source.process
+            self._writes_out = _takes_out(source.process)
+        elif hasattr(source, '__next__'):
+            self._next = lambda n: next(source)
+        else:
+            self._next = source
+
+    def run(self):
+        if self._writes_out:
+            self._next(self.buffer.shape[-1], out=self.buffer)
+        else:
+            np.copyto(self.buffer, self._next(self.buffer.shape[-1]))
+
+
+class _Processor(_Node):
+    def __init__(self, processor):
+        if getattr(processor, 'streaming', True) is False:
+            raise ValueError(f"{type(processor).__name__} keeps its whole history; create it with streaming=True")
+        self.processor = processor
+        call = getattr(processor, 'process', processor)
+        self._call = call
+        self._writes_out = call is not None and _takes_out(call)
+
+    def bind(self, buffer, input_buffers):
+        super().bind(buffer, input_buffers)
+        # several inputs are mixed into a buffer of their own, allocated here
+        self._mix = input_buffers[0] if len(input_buffers) == 1 else np.zeros(buffer.shape)
+
+    def run(self):
+        x = self._mix
+        if len(self.input_buffers) > 1:
+            np.add(self.input_buffers[0], self.input_buffers[1], out=x)
+            for other in self.input_buffers[2:]:
+                np.add(x, other, out=x)
+
+        if self._call is None:
+            np.copyto(self.buffer, x)
+        elif self._writes_out:
+            self._call(x, out=self.buffer)
+        else:
+            np.copyto(self.buffer, self._call(x))
+
+
+def _takes_out(call):
+    try:
+        return 'out' in inspect.signature(call).parameters
+    except (TypeError, ValueError):
+        return False
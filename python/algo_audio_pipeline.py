@@ -0,0 +1,132 @@
+import asyncio
+
+import numpy as np
+
+from util_wave_files import WavWriter, read_wav_blocks, wav_info
+
+#####################################################
+#
+# asyncio streaming pipeline
+#
+#    A stream is an async iterator of blocks; a stage is a function taking
+#    one stream and returning another. pipeline() runs the source and every
+#    stage as its own task, joined by bounded queues: a stage that gets
+#    maxsize blocks ahead of the next one waits, so memory stays bounded and
+#    a slow writer slows the reader down instead of piling up blocks.
+#
+#    File I/O and numeric work run in an executor (the event loop's default
+#    thread pool unless one is given). The NumPy/SciPy kernels release the
+#    GIL, so many streams make progress at once and none of them block the
+#    event loop. A processor is only ever called with one block at a time,
+#    in order, so stateful filters keep working.
+#
+#####################################################
+
+MAXSIZE = 4
+_DONE = object()
+
+
+def pipeline(source, *stages, maxsize=MAXSIZE):
+    """ source -> stages..., each decoupled from the next by a queue of at most maxsize blocks """
+    blocks = buffered(source, maxsize)
+    for stage in stages:
+        blocks = buffered(stage(blocks), maxsize, upstream=blocks)
+    return blocks
+
+
+async def buffered(blocks, maxsize=MAXSIZE, upstream=None):
+    """ drive blocks from a task of its own, at most maxsize blocks ahead of the consumer.
+    When the consumer stops early (break + aclose(), or cancellation) the task is cancelled
+    and blocks closed, then upstream - the stream blocks reads from, which a stage's own
+    `async for` leaves open - so closing the end of a pipeline closes all of it """
+    queue = asyncio.Queue(maxsize)
+    task = asyncio.ensure_future(_pump(blocks, queue))
+    try:
+        while True:
+            block = await queue.get()
+            if block is _DONE:
+                break
+            yield block
+    finally:
+        if not task.done():
+            task.cancel()
+        try:
+            await task  # re-raises anything the producer raised
+        except asyncio.CancelledError:
+            pass
+        finally:
+            await _aclose(blocks)
+            await _aclose(upstream)
+
+
+async def _pump(blocks, queue):
+    try:
+        async for block in blocks:
+            await queue.put(block)
+    except Exception:
+        await queue.put(_DONE)
+        raise
+    finally:
+        await _aclose(blocks)
+    await queue.put(_DONE)
+
+
+async def _aclose(blocks):
+    """ close an async generator (closing a finished one is a no-op) """
+    aclose = getattr(blocks, 'aclose', None)
+    if aclose is not None:
+        await aclose()
+
+
+async def iterate(iterable, executor=None):
+    """ a stream from a blocking iterator (e.g. read_wav_blocks, wv_blocks), advanced in the executor """
+    loop = asyncio.get_running_loop()
+    iterator = iter(iterable)
+    while True:
+        block = await loop.run_in_executor(executor, next, iterator, _DONE)
+        if block is _DONE:
+            return
+        yield block
+
+
+def wav_source(path, block_size=4096, dtype=float, executor=None):
+    """ stream a WAV file as (n_channels, block_size) blocks """
+    return iterate(read_wav_blocks(path, block_size, dtype), executor)
+
+
+def process_stage(processor, executor=None):
+    """ a stage calling processor.process (or processor itself) on each block in the executor """
+    call = getattr(processor, 'process', processor)
+
+    def run(block):
+        # some processors hand back a buffer they reuse on the next call (e.g. a
+        # streaming DcBlocker); queued blocks must not change under the consumer
+        return np.array(call(block))
+
+    async def stage(blocks):
+        loop = asyncio.get_running_loop()
+        async for block in blocks:
+            yield await loop.run_in_executor(executor, run, block)
+
+    return stage
+
+
+async def wav_sink(blocks, path, fs, channels, sample_format='int16', executor=None):
+    """ write a stream to a WAV file; returns the number of frames written """
+    loop = asyncio.get_running_loop()
+    writer = await loop.run_in_executor(executor, WavWriter, path, fs, channels, sample_format)
+    try:
+        async for block in blocks:
+            await loop.run_in_executor(executor, writer.write, block)
+    finally:
+        await loop.run_in_executor(executor, writer.close)
+    return writer.n_frames
+
+
+async def render_wav(in_path, out_path, processors, block_size=4096, sample_format=None, maxsize=MAXSIZE,
+                     executor=None):
+    """ file -> processors -> file, e.g. with util_batch_render.build_chain(stages, fs) as processors """
+    info = await asyncio.get_running_loop().run_in_executor(executor, wav_info, in_path)
+    blocks = pipeline(wav_source(in_path, block_size, executor=executor),
+                      *[process_stage(p, executor) for p in processors], maxsize=maxsize)
+    return await wav_sink(blocks, out_path, info.fs, info.channels, sample_format or info.sample_format, executor)
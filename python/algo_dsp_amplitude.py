@@ -1,4 +1,210 @@
+import numpy as np
+
+from algo_dsp_filters import iir_filter
+from util_buffers import into
+
+
 def inc(x):
     return x + 1
 
 
+#####################################################
+#
+# Dynamics
+#
+#    Everything runs a block at a time with its state carried between calls,
+#    and nothing loops per sample in Python:
+#      - release: y[n] = max(x[n], c * y[n-1]) is, in the log domain, a
+#        running maximum of log x[k] - k log c, i.e. one np.maximum.accumulate
+#      - attack: a one-pole low-pass (iir_filter)
+#      - lookahead: a sliding maximum in O(1) per sample (van Herk / Gil-Werman)
+#    Gain computation is done in dB on whole blocks.
+#    Blocks are 1-D or (n_channels, n_samples); the compressor and limiter
+#    link their channels (one gain from the loudest), the follower does not.
+#    process(block, out=None) writes into out when it is given.
+#
+#####################################################
+
+
+def db_to_gain(db):
+    return 10.0 ** (np.asarray(db, dtype=float) / 20.0)
+
+
+def gain_to_db(gain):
+    with np.errstate(divide='ignore'):
+        return 20.0 * np.log10(np.asarray(gain, dtype=float))
+
+
+def time_constant(fs, ms):
+    """ one-pole coefficient that covers 1 - 1/e of a step in ms milliseconds (0 ms -> 0, instant) """
+    return float(np.exp(-1000.0 / (ms * fs))) if ms > 0 else 0.0
+
+
+def sliding_max(x, window):
+    """ out[i] = max(x[..., i:i + window]) along the last axis, O(1) per sample """
+    n = x.shape[-1]
+    if window == 1:
+        return x.copy()
+    padded = np.pad(x, [(0, 0)] * (x.ndim - 1) + [(0, -n % window)], constant_values=-np.inf)
+    runs = padded.reshape(padded.shape[:-1] + (-1, window))
+    prefix = np.maximum.accumulate(runs, axis=-1).reshape(padded.shape)
+    suffix = np.maximum.accumulate(runs[..., ::-1], axis=-1)[..., ::-1].reshape(padded.shape)
+    count = n - window + 1
+    return np.maximum(suffix[..., :count], prefix[..., window - 1:window - 1 + count])
+
+
+def _release(level, coeff, previous):
+    """ y[n] = max(level[n], coeff * y[n-1]) for level >= 0, with y[-1] = previous """
+    if coeff == 0.0:
+        return level.copy()
+    log_c = np.log(coeff)
+    k = np.arange(level.shape[-1])
+    with np.errstate(divide='ignore'):
+        held = np.maximum.accumulate(np.log(level) - k * log_c, axis=-1)
+        held = np.maximum(held, np.log(previous)[..., np.newaxis] + log_c)
+    return np.exp(held + k * log_c)
+
+
+def _attack(x, coeff, zi):
+    """ one-pole smoothing; returns (y, zf) """
+    return iir_filter(x, [1.0 - coeff], [1.0, -coeff], zi)
+
+
+class EnvelopeFollower:
+    """
+    Peak or RMS envelope of each channel: the level rises through a one-pole
+    attack and falls with an exponential release. In 'rms' mode the same
+    detector runs on x^2 and the square root is returned.
+    """
+    def __init__(self, fs, attack_ms=1.0, release_ms=100.0, mode='peak'):
+        if mode not in ('peak', 'rms'):
+            raise ValueError(f"unknown mode '{mode}', expected 'peak' or 'rms'")
+        self.fs = fs
+        self.mode = mode
+        self.attack = time_constant(fs, attack_ms)
+        self.release = time_constant(fs, release_ms)
+        self.reset()
+
+    def __str__(self):
+        return f"fs = {self.fs}, mode = {self.mode}, attack = {self.attack}, release = {self.release}"
+
+    def reset(self):
+        self._held = None
+        self._zi = None
+
+    def process(self, block, out=None):
+        x = np.asarray(block, dtype=float)
+        if self._held is None:
+            self._held = np.zeros(x.shape[:-1])
+            self._zi = np.zeros(x.shape[:-1] + (1,))
+        level = x * x if self.mode == 'rms' else np.abs(x)
+        if x.shape[-1] == 0:
+            return into(out, level)
+
+        held = _release(level, self.release, self._held)
+        self._held = held[..., -1].copy()
+        envelope, self._zi = _attack(held, self.attack, self._zi)
+        if self.mode == 'rms':
+            return np.sqrt(envelope, out=envelope if out is None else out)
+        return into(out, envelope)
+
+
+class Compressor:
+    """
+    Feed-forward compressor (log-domain gain computer with a soft knee, as in
+    Giannoulis, Massberg & Reiss, "Digital Dynamic Range Compressor Design").
+    Gain reduction in dB is smoothed with the release hold and attack filter,
+    then makeup gain is added. gain_db holds the gain applied to the last block.
+    """
+    def __init__(self, fs, threshold_db=-20.0, ratio=4.0, attack_ms=5.0, release_ms=100.0, knee_db=0.0,
+                 makeup_db=0.0):
+        self.fs = fs
+        self.threshold_db = threshold_db
+        self.ratio = ratio
+        self.knee_db = knee_db
+        self.makeup_db = makeup_db
+        self.attack = time_constant(fs, attack_ms)
+        self.release = time_constant(fs, release_ms)
+        self.reset()
+
+    def __str__(self):
+        return f"threshold = {self.threshold_db} dB, ratio = {self.ratio}, knee = {self.knee_db} dB"
+
+    def reset(self):
+        self._held = np.zeros(())
+        self._zi = np.zeros(1)
+        self.gain_db = np.zeros(0)
+
+    def gain_reduction(self, level_db):
+        """ static curve: dB of reduction (>= 0) for each input level in dB """
+        over = np.asarray(level_db, dtype=float) - self.threshold_db
+        slope = 1.0 - 1.0 / self.ratio
+        knee = self.knee_db
+        reduction = slope * np.maximum(over, 0.0)
+        if knee > 0:
+            in_knee = np.abs(over) <= knee / 2
+            reduction = np.where(in_knee, slope * (over + knee / 2) ** 2 / (2 * knee), reduction)
+        return reduction
+
+    def process(self, block, out=None):
+        x = np.asarray(block, dtype=float)
+        if x.shape[-1] == 0:
+            return into(out, x.copy())
+        level = np.abs(x) if x.ndim == 1 else np.max(np.abs(x), axis=0)
+        reduction = self.gain_reduction(gain_to_db(level))
+
+        held = _release(reduction, self.release, self._held)
+        self._held = held[-1]
+        smoothed, self._zi = _attack(held, self.attack, self._zi)
+
+        self.gain_db = self.makeup_db - smoothed
+        return np.multiply(x, db_to_gain(self.gain_db), out=out)
+
+
+class LookaheadLimiter:
+    """
+    Brickwall limiter: no output sample exceeds ceiling_db. The gain needed by
+    each sample is known lookahead_ms in advance, so the gain ramps down over
+    the lookahead (a moving average of the windowed minimum, which can never
+    be above the minimum at the peak) and recovers with the release. The
+    audio is delayed by `latency` samples to line up with its gain.
+    """
+    def __init__(self, fs, ceiling_db=-1.0, lookahead_ms=5.0, release_ms=50.0):
+        self.fs = fs
+        self.ceiling = float(db_to_gain(ceiling_db))
+        self.latency = max(1, int(round(lookahead_ms * fs / 1000.0)))
+        self.release = time_constant(fs, release_ms)
+        self.reset()
+
+    def __str__(self):
+        return f"ceiling = {self.ceiling}, latency = {self.latency} samples, release = {self.release}"
+
+    def reset(self):
+        self._audio = None
+        self._depth = np.zeros(self.latency)
+        self._held = np.zeros(())
+        self._zi = np.zeros(self.latency - 1)
+        self.gain = np.zeros(0)
+
+    def process(self, block, out=None):
+        x = np.asarray(block, dtype=float)
+        if self._audio is None:
+            self._audio = np.zeros(x.shape[:-1] + (self.latency,))
+        if x.shape[-1] == 0:
+            return into(out, x.copy())
+
+        # depth = 1 - required gain, so that the limiting is all running maxima
+        peak = np.abs(x) if x.ndim == 1 else np.max(np.abs(x), axis=0)
+        with np.errstate(divide='ignore'):
+            depth = 1.0 - np.minimum(1.0, self.ceiling / peak)
+        history = np.concatenate((self._depth, depth))
+        self._depth = history[-self.latency:]
+
+        held = _release(sliding_max(history, self.latency + 1), self.release, self._held)
+        self._held = held[-1]
+        ramp, self._zi = iir_filter(held, np.full(self.latency, 1.0 / self.latency), [1.0], self._zi)
+        self.gain = 1.0 - ramp
+
+        audio = np.concatenate((self._audio, x), axis=-1)
+        self._audio = audio[..., -self.latency:]
+        return np.multiply(audio[..., :x.shape[-1]], self.gain, out=out)
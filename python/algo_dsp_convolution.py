@@ -0,0 +1,228 @@
+import numpy as np
+from scipy.fft import irfft, next_fast_len, rfft
+from scipy.signal import lfilter
+
+from util_buffers import into
+
+#####################################################
+#
+# FIR convolution engine
+#
+#    Streams y[n] = sum_k h[k] x[n - k] block by block with no added latency:
+#    every call returns exactly as many samples as it was given, and the
+#    output does not depend on how the signal was split into blocks.
+#
+#    direct          lfilter over the taps; short filters
+#    overlap-save    one FFT per block covering block + taps - 1 samples;
+#                    filters no longer than the block
+#    uniform         the first block_size taps run directly (or overlap-save),
+#                    the rest as equal block_size partitions whose spectra are
+#                    multiplied against a frequency-domain delay line of past
+#                    input spectra
+#    non-uniform     as uniform, but the tail partitions double in size every
+#                    SEGMENT_PARTITIONS partitions (up to MAX_PARTITION); a
+#                    partition that starts at least its own length into the
+#                    filter only needs input that has already arrived, so the
+#                    big FFTs add no latency
+#
+#    Filter spectra are computed once, when the filter is built.
+#
+#####################################################
+
+METHODS = ('direct', 'overlap-save', 'uniform', 'non-uniform')
+DIRECT_MAX_TAPS = 64
+UNIFORM_MAX_PARTITIONS = 32
+SEGMENT_PARTITIONS = 4
+MAX_PARTITION = 16384
+
+
+def fir_filter(samples, h, method='auto'):
+    """ Convolve a whole 1-D or (n_channels, n_samples) signal with h, keeping len(samples) outputs """
+    samples = np.asarray(samples)
+    return FirFilter(h, max(samples.shape[-1], 1), method).process(samples)
+
+
+def choose_method(n_taps, block_size):
+    """ the engine 'auto' picks for a filter length and block size """
+    if n_taps <= DIRECT_MAX_TAPS:
+        return 'direct'
+    if n_taps <= block_size:
+        return 'overlap-save'
+    if n_taps <= UNIFORM_MAX_PARTITIONS * block_size:
+        return 'uniform'
+    return 'non-uniform'
+
+
+class FirFilter:
+    """
+    Streaming FIR filter for impulse responses from a few taps to hundreds of
+    thousands. block_size is the block length process() is expected to see;
+    it sets the partition size and the 'auto' method, but blocks of any length
+    are accepted. float32 blocks come back as float32 (the arithmetic is float64).
+    """
+    def __init__(self, h, block_size=512, method='auto'):
+        self.h = np.array(h, dtype=float)
+        self.block_size = block_size
+        self.method = choose_method(len(self.h), block_size) if method == 'auto' else method
+        if self.method not in METHODS:
+            raise ValueError(f"unknown method '{self.method}', expected 'auto' or one of {METHODS}")
+
+        if self.method in ('direct', 'overlap-save'):
+            head_taps = self.h
+        else:
+            head_taps = self.h[:block_size]
+        self._head = _Direct(head_taps) if self.method == 'direct' or len(head_taps) <= DIRECT_MAX_TAPS \
+            else _OverlapSave(head_taps)
+        self._segments = [_Segment(self.h, offset, size, parts)
+                          for offset, size, parts in _partition(len(self.h), block_size, self.method)]
+        self.latency = 0
+        self.reset()
+
+    def __str__(self):
+        return f"taps = {len(self.h)}, method = {self.method}, block_size = {self.block_size}"
+
+    def reset(self):
+        self.position = 0
+        self._head.reset()
+        for segment in self._segments:
+            segment.reset()
+        self._ring = None
+
+    def process(self, block, out=None):
+        """ filter the next 1-D or (n_channels, n_samples) block (into out, if given) """
+        x = np.asarray(block)
+        if x.shape[-1] == 0:
+            return into(out, np.array(x, dtype=np.float32 if x.dtype == np.float32 else float))
+        y = self._head.process(x.astype(float, copy=False))
+        if self._segments:
+            self._process_tail(x.astype(float, copy=False), y)
+        self.position += x.shape[-1]
+        if out is not None:
+            return into(out, y)
+        return y.astype(np.float32) if x.dtype == np.float32 else y
+
+    def _process_tail(self, x, y):
+        """ add the partitioned tail, stepping from one partition boundary to the next """
+        if self._ring is None:
+            reach = max(segment.offset for segment in self._segments)
+            self._ring = np.zeros(x.shape[:-1] + (1 << int(reach).bit_length(),))
+
+        step = self._segments[0].size
+        start = 0
+        while start < x.shape[-1]:
+            position = self.position + start
+            stop = min(x.shape[-1], start + step - position % step)
+            for segment in self._segments:
+                if position % segment.size == 0:
+                    segment.advance(self._read(position - segment.offset, segment.size))
+                within = position % segment.size
+                y[..., start:stop] += segment.out[..., within:within + stop - start]
+            self._write(position, x[..., start:stop])
+            start = stop
+
+    def _write(self, position, x):
+        size = self._ring.shape[-1]
+        index = (position + np.arange(x.shape[-1])) & (size - 1)
+        self._ring[..., index] = x
+
+    def _read(self, position, n):
+        size = self._ring.shape[-1]
+        return self._ring[..., (position + np.arange(n)) & (size - 1)]
+
+
+def _partition(n_taps, block_size, method):
+    """ (offset, partition size, number of partitions) for each tail segment """
+    if method in ('direct', 'overlap-save') or n_taps <= block_size:
+        return []
+    if method == 'uniform':
+        return [(block_size, block_size, -(-(n_taps - block_size) // block_size))]
+
+    segments = []
+    offset, size = block_size, block_size
+    while offset < n_taps:
+        remaining = -(-(n_taps - offset) // size)
+        parts = remaining if size >= MAX_PARTITION else min(SEGMENT_PARTITIONS, remaining)
+        segments.append((offset, size, parts))
+        offset += parts * size
+        if size < MAX_PARTITION and 2 * size <= offset:
+            size *= 2
+    return segments
+
+
+class _Direct:
+    """ time-domain FIR via lfilter, state carried between blocks """
+    def __init__(self, h):
+        self.h = h
+        self.reset()
+
+    def reset(self):
+        self.zi = None
+
+    def process(self, x):
+        if len(self.h) == 1:
+            return x * self.h[0]
+        if self.zi is None:
+            self.zi = np.zeros(x.shape[:-1] + (len(self.h) - 1,))
+        y, self.zi = lfilter(self.h, [1.0], x, zi=self.zi)
+        return y
+
+
+class _OverlapSave:
+    """ one FFT per block over the last taps - 1 inputs and the block; spectra cached per FFT size """
+    def __init__(self, h):
+        self.h = h
+        self._spectra = {}
+        self.reset()
+
+    def reset(self):
+        self.history = None
+
+    def process(self, x):
+        taps = len(self.h)
+        if self.history is None:
+            self.history = np.zeros(x.shape[:-1] + (taps - 1,))
+        extended = np.concatenate((self.history, x), axis=-1)
+        self.history = extended[..., extended.shape[-1] - (taps - 1):]
+
+        n_fft = next_fast_len(extended.shape[-1], real=True)
+        if n_fft not in self._spectra:
+            if len(self._spectra) >= 16:
+                self._spectra.clear()  # block sizes keep changing; don't hold on to every size seen
+            self._spectra[n_fft] = rfft(self.h, n_fft)
+        return irfft(rfft(extended, n_fft) * self._spectra[n_fft], n_fft)[..., taps - 1:extended.shape[-1]]
+
+
+class _Segment:
+    """
+    parts partitions of size taps, starting offset taps into h, run as uniformly
+    partitioned overlap-save on the input delayed by offset
+    """
+    def __init__(self, h, offset, size, parts):
+        self.offset = offset
+        self.size = size
+        taps = np.zeros(parts * size)
+        piece = h[offset:offset + parts * size]
+        taps[:len(piece)] = piece
+        self.spectra = rfft(taps.reshape(parts, size), 2 * size, axis=-1)
+        self.reset()
+
+    def reset(self):
+        self.delay_line = None
+        self.previous = None
+        self.out = None
+        self.head = 0
+
+    def advance(self, x):
+        """ take the next size delayed inputs and compute the next size outputs into out """
+        parts = len(self.spectra)
+        if self.delay_line is None:
+            self.delay_line = np.zeros((parts,) + x.shape[:-1] + (self.size + 1,), dtype=complex)
+            self.previous = np.zeros(x.shape)
+
+        self.head = (self.head + 1) % parts
+        self.delay_line[self.head] = rfft(np.concatenate((self.previous, x), axis=-1), axis=-1)
+        self.previous = x
+
+        order = (self.head - np.arange(parts)) % parts
+        spectrum = np.einsum('p...f,pf->...f', self.delay_line[order], self.spectra)
+        self.out = irfft(spectrum, 2 * self.size, axis=-1)[..., self.size:]
@@ -1,36 +1,194 @@
+from functools import lru_cache
+
 import numpy as np
 
+from util_buffers import into
+
 #####################################################
 #
-# Filter functions from Will Pirkle's FX book
+# IIR execution engine
+#
+# Every filter below is a linear difference equation
+#     y[n] = b0*x[n] + b1*x[n-1] + ... - a1*y[n-1] - a2*y[n-2] - ...
+# so they all dispatch to iir_filter, which runs the recursion at array speed
+# (scipy.signal.lfilter, transposed direct form II) instead of a Python loop.
+# Only the order in which the terms are summed differs from the per-sample
+# loops, so outputs agree with them to within a few ULPs; the tests hold them
+# to 1e-12 of the signal peak.
+#
+# dtype policy: float32 signals come back as float32, anything else (lists,
+# ints, float64) as float64. The recursion itself - coefficients and state -
+# always runs in float64, over float32 input converted FLOAT32_CHUNK samples at
+# a time, so the only extra error is the final rounding: each float32 output
+# is within half an ulp (|y| * 2**-24) of the float64 result, and block-wise
+# float32 processing is still bit-identical to a single call. (A float32
+# recursion would put ~1e-7 relative error on the poles, which for narrow or
+# low-frequency filters at high sample rates moves the response by dBs.)
+# Coefficient designers always return float64.
+#
+# scipy.signal takes over a second to import, so it is imported by the engine
+# functions on first use: coefficient design and anything that only needs the
+# module's names never load it.
 #
 #####################################################
 
+FLOAT32_CHUNK = 65536
 
-def one_zero_filter(samples, a0, a1):
-    """ equation 9.1 - first order feed-forward filter """
-    out = []
-    x1 = 0
 
-    for xn in samples:
-        yn = a0 * xn + a1 * x1
-        out.append(yn)
-        x1 = xn
+def iir_filter(samples, b, a, zi=None, out=None):
+    """ Run the difference equation given by b and a over samples
+    :param samples: The input signal, 1-D or (n_channels, n_samples); filtering runs along the last axis
+    :param b: Feed-forward coefficients [b0, b1, ...], or one row per channel
+    :param a: Feedback coefficients [1, a1, a2, ...], or one row per channel
+    :param zi: State carried in from a previous call (None = zero state), shape (..., order)
+    :param out: Optional array, shaped like samples, to write the filtered signal into
+    :return: The filtered signal and the state to carry into the next call (y, zf)
+    """
+    if _is_float32(samples):
+        return _float32_chunks(lambda x, zi, _: iir_filter(x, b, a, zi), samples, zi, FLOAT32_CHUNK, out)
+
+    from scipy.signal import lfilter
+
+    x = np.asarray(samples, dtype=float)
+    b = np.asarray(b, dtype=float)
+    a = np.asarray(a, dtype=float)
+    order = max(b.shape[-1], a.shape[-1]) - 1
+
+    if zi is None:
+        zi = np.zeros(x.shape[:-1] + (order,))
+
+    if b.ndim == 1 and a.ndim == 1:
+        y, zf = lfilter(b, a, x, zi=zi)
+        return into(out, y), zf
+
+    # Per-channel coefficients: channels that share a coefficient set go through
+    # lfilter together, so identical channels still cost a single pass.
+    n_channels = x.shape[0]
+    b = np.broadcast_to(np.pad(np.atleast_2d(b), ((0, 0), (0, order + 1 - b.shape[-1]))), (n_channels, order + 1))
+    a = np.broadcast_to(np.pad(np.atleast_2d(a), ((0, 0), (0, order + 1 - a.shape[-1]))), (n_channels, order + 1))
+    zi = np.broadcast_to(zi, (n_channels, order))
+    y = np.empty(x.shape) if out is None else out
+    zf = np.empty((n_channels, order))
+
+    sets, group = np.unique(np.hstack((b, a)), axis=0, return_inverse=True)
+    for g in range(len(sets)):
+        rows = np.flatnonzero(group == g)
+        y[rows], zf[rows] = lfilter(b[rows[0]], a[rows[0]], x[rows], zi=zi[rows])
+
+    return y, zf
+
+
+def sos_filter(samples, sos, zi=None, out=None):
+    """ Run a cascade of second-order sections over samples in one fused pass
+    :param samples: The input signal, 1-D or (n_channels, n_samples); filtering runs along the last axis
+    :param sos: One row [b0, b1, b2, 1, a1, a2] per section
+    :param zi: State carried in from a previous call (None = zero state), shape (n_sections, ..., 2)
+    :param out: Optional array, shaped like samples, to write the filtered signal into
+    :return: The filtered signal and the state to carry into the next call (y, zf)
+    """
+    if _is_float32(samples):
+        return _float32_chunks(lambda x, zi, _: sos_filter(x, sos, zi), samples, zi, FLOAT32_CHUNK, out)
 
-    return out
+    from scipy.signal import sosfilt
 
+    x = np.asarray(samples, dtype=float)
+    sos = np.asarray(sos, dtype=float)
 
-def one_pole_filter(samples, a0, b1):
-    """ equation 9.2 - first order feedback filter """
-    out = []
-    y1 = 0
+    if zi is None:
+        zi = np.zeros((len(sos),) + x.shape[:-1] + (2,))
+
+    y, zf = sosfilt(sos, x, zi=zi)
+    return into(out, y), zf
 
-    for xn in samples:
-        yn = a0 * xn - b1 * y1
-        out.append(yn)
-        y1 = yn
 
-    return out
+def modulated_filter(samples, coeffs, control_block=32, zi=None, out=None):
+    """ Run a biquad whose coefficients change every control_block samples
+    :param samples: The input signal, 1-D or (n_channels, n_samples)
+    :param coeffs: (n_blocks, 5) trajectory of [a0, a1, a2, b1, b2] rows, one per control block
+    :param control_block: Samples per coefficient update
+    :param zi: State carried in from a previous call (None = zero state)
+    :param out: Optional array, shaped like samples, to write the filtered signal into
+    :return: The filtered signal and the state to carry into the next call (y, zf)
+
+    The transposed direct form state is carried straight across coefficient
+    changes, and runs of identical rows are merged into a single lfilter call.
+    """
+    coeffs = np.asarray(coeffs, dtype=float)
+    if _is_float32(samples):
+        step = control_block * max(1, FLOAT32_CHUNK // control_block)
+        return _float32_chunks(lambda x, zi, start: modulated_filter(
+            x, coeffs[start // control_block:(start + step) // control_block], control_block, zi),
+            samples, zi, step, out)
+
+    from scipy.signal import lfilter
+
+    x = np.asarray(samples, dtype=float)
+    if zi is None:
+        zi = np.zeros(x.shape[:-1] + (2,))
+
+    y = np.empty(x.shape) if out is None else out
+    b = coeffs[:, 0:3]
+    a = _coefficients(1.0, coeffs[:, 3], coeffs[:, 4])
+    rows = np.concatenate(([0], np.flatnonzero(np.any(np.diff(coeffs, axis=0) != 0, axis=1)) + 1))
+    starts = rows * control_block
+    stops = np.append(starts[1:], x.shape[-1])
+    for row, start, stop in zip(rows.tolist(), starts.tolist(), stops.tolist()):
+        y[..., start:stop], zi = lfilter(b[row], a[row], x[..., start:stop], zi=zi)
+
+    return y, zi
+
+
+def _is_float32(samples):
+    return getattr(samples, 'dtype', None) == np.float32
+
+
+def _float32_chunks(run, samples, zi, chunk, out=None):
+    """ float32 in/out (or into out) around a float64 run(x, zi, start) -> (y, zf); the
+    float64 copies are chunk-sized and the state is carried between chunks in float64 """
+    y = np.empty(samples.shape, dtype=np.float32) if out is None else out
+    for start in range(0, samples.shape[-1], chunk):
+        y[..., start:start + chunk], zi = run(samples[..., start:start + chunk].astype(float), zi, start)
+    return y, zi
+
+
+def _control_trajectory(values, n_samples, control_block):
+    """ resample a parameter (scalar, per-sample or coarser) onto the control-block centers """
+    values = np.atleast_1d(np.asarray(values, dtype=float))
+    centers = (np.arange(-(-n_samples // control_block)) + 0.5) * control_block
+    if len(values) == 1:
+        return np.full(len(centers), values[0])
+    return np.interp(centers, np.linspace(0, n_samples - 1, len(values)), values)
+
+
+def _coefficients(*terms):
+    """ stack scalar or per-channel coefficient terms into a (..., n_terms) array """
+    return np.stack(np.broadcast_arrays(*[np.asarray(t, dtype=float) for t in terms]), axis=-1)
+
+
+def _like_input(samples, y, out=None):
+    """ lists in give lists out, as the per-sample loops did (unless out was given) """
+    if isinstance(samples, list) and out is None:
+        return y.tolist()
+    return y
+
+
+#####################################################
+#
+# Filter functions from Will Pirkle's FX book
+#
+#####################################################
+
+
+def one_zero_filter(samples, a0, a1, out=None):
+    """ equation 9.1 - first order feed-forward filter """
+    y, _ = iir_filter(samples, _coefficients(a0, a1), [1.0], out=out)
+    return _like_input(samples, y, out)
+
+
+def one_pole_filter(samples, a0, b1, out=None):
+    """ equation 9.2 - first order feedback filter """
+    y, _ = iir_filter(samples, _coefficients(a0), _coefficients(1.0, b1), out=out)
+    return _like_input(samples, y, out)
 
 
 def simple_resonator_coefficients(fs, fc, q):
@@ -44,34 +202,15 @@ def simple_resonator_coefficients(fs, fc, q):
     return theta_c, bw, b2, b1, a0
 
 
-def simple_resonator(samples, fs, fc, q):
+def simple_resonator(samples, fs, fc, q, out=None):
     """ simple resonator filter """
-    y = np.zeros(samples.shape)
-    yz1 = 0
-    yz2 = 0
-
-    theta_c = 2.0 * np.pi * fc / fs
-    bw = fc / q
-    b2 = np.e ** (-2 * np.pi * (bw / fs))
-    b1 = ((-4 * b2) / (1 + b2)) * np.cos(theta_c)
-    a0 = (1 - b2) * np.sqrt(1 - ((b1 ** 2) / (4 * b2)))
-
-    for i in range(len(samples)):
-        y[i] = a0 * samples[i] - b1 * yz1 - b2 * yz2
-        yz2 = yz1
-        yz1 = y[i]
-
+    _, _, b2, b1, a0 = simple_resonator_coefficients(fs, fc, q)
+    y, _ = iir_filter(samples, _coefficients(a0), _coefficients(1.0, b1, b2), out=out)
     return y
 
 
-def second_order_lowpass(samples, fs, fc, q):
-    """ second order LPF (kLPF2), page 271 """
-    y = np.zeros(samples.shape)
-    yz1 = 0
-    yz2 = 0
-    xz1 = 0
-    xz2 = 0
-
+def second_order_lowpass_coefficients(fs, fc, q):
+    """ Coefficients [a0, a1, a2, b1, b2, c0, d0] for the kLPF2 on page 271 """
     theta_c = 2.0 * np.pi * fc / fs
     d = 1.0 / q
     beta_numerator = 1.0 - ((d / 2.0) * (np.sin(theta_c)))
@@ -88,37 +227,204 @@ def second_order_lowpass(samples, fs, fc, q):
     c0 = 1.0
     d0 = 0.0
 
-    for i in range(len(samples)):
-        y[i] = d0 * samples[i] + c0 * (a0 * samples[i] + a1 * xz1 + a2 * xz2 - b1 * yz1 - b2 * yz2)
-        yz2 = yz1
-        yz1 = y[i]
-        xz2 = xz1
-        xz1 = samples[i]
+    return a0, a1, a2, b1, b2, c0, d0
+
 
+def second_order_lowpass(samples, fs, fc, q, out=None):
+    """ second order LPF (kLPF2), page 271 """
+    a0, a1, a2, b1, b2, c0, d0 = second_order_lowpass_coefficients(fs, fc, q)
+    y, _ = iir_filter(samples, _coefficients(d0 + c0 * a0, c0 * a1, c0 * a2),
+                      _coefficients(1.0, c0 * b1, c0 * b2), out=out)
     return y
 
 
-def bi_quad(signal, params):
+def bi_quad(signal, params, out=None):
     """ Simple biquad implementation
-    :param signal: The input signal
-    :param params: Filter coefficients in a list like [a0, a1, a2, b1, b2]
+    :param signal: The input signal, 1-D or (n_channels, n_samples)
+    :param params: Filter coefficients in a list like [a0, a1, a2, b1, b2], or one such row per channel
+    :param out: Optional array, shaped like signal, to write the result into
     :return: The filtered signal (out)
+
+    Note: this version has always added the dry input to the a0 term, i.e. its
+    feed-forward gain is (1 + a0); that is kept so existing renders don't change.
+    """
+    p = np.asarray(params, dtype=float)
+    y, _ = iir_filter(signal, _coefficients(1.0 + p[..., 0], p[..., 1], p[..., 2]),
+                      _coefficients(1.0, p[..., 3], p[..., 4]), out=out)
+    return y
+
+
+#####################################################
+#
+# Biquad coefficient design
+#
+#####################################################
+
+
+BI_QUAD_KINDS = {
+    1: 'one pole LP', 2: 'one pole HP',
+    3: 'lowpass 1p1z', 4: 'highpass 1p1z',
+    5: 'LP', 6: 'HP', 7: 'BP', 8: 'notch', 9: 'peak',
+    10: 'low_shelf', 11: 'high_shelf',
+    12: 'low_shelf 1st', 13: 'high_shelf 1st',
+    14: 'allpass', 15: 'allpass 1st'
+}
+
+
+def bi_quad_coeffs(kind, fc, fs, q, peak_gain):
+    """ generate coefficients before calling bi_quad(samples, params)
+        based on https://www.earlevel.com/main/2011/01/02/biquad-formulas/
+
+    :param: kind (see BI_QUAD_KINDS for kinds)
+    :param: fc (corner frequency, a.k.a, cutoff)
+    :param: fs (sample rate)
+    :param: q (resonance, a.k.a, quality factor)
+    :param: peak_gain (for shelving filters, gain @ peak)
+    :return: list of coefficients [a0, a1, a2, b1, b2] for requested filter kind;
+             when fc, q or peak_gain are arrays, an (N, 5) array with one row per point
+
+    Scalar designs are memoized on (kind, fc, fs, q, peak_gain), so recomputing the
+    same coefficients every block is a dictionary lookup.
     """
-    out = np.zeros(signal.shape)
-    yz1 = 0
-    yz2 = 0
-    xz1 = 0
-    xz2 = 0
+    if kind not in BI_QUAD_KINDS:
+        raise ValueError(f"unknown bi_quad kind {kind}, expected one of {sorted(BI_QUAD_KINDS)}")
+
+    try:
+        return list(_bi_quad_coeffs_cached(kind, fc, fs, q, peak_gain))
+    except TypeError:
+        pass  # arrays aren't hashable; design all points in one vectorized call
+
+    shape = np.broadcast(fc, fs, q, peak_gain).shape
+    coeffs = [np.broadcast_to(c, shape) for c in _bi_quad_design(kind, fc, fs, q, peak_gain)]
+    return np.stack(coeffs, axis=-1).reshape(-1, 5)
+
+
+@lru_cache(maxsize=4096)
+def _bi_quad_coeffs_cached(kind, fc, fs, q, peak_gain):
+    return tuple(float(c) for c in _bi_quad_design(kind, fc, fs, q, peak_gain))
+
+
+def _bi_quad_design(kind, fc, fs, q, peak_gain):
+    """ the bi_quad_coeffs formulas, written to broadcast over array arguments """
+    fc = np.asarray(fc, dtype=float)
+    q = np.asarray(q, dtype=float)
+    boost = np.asarray(peak_gain) >= 0
+
+    v = np.power(10, np.abs(peak_gain) / 20)
+    k = np.tan(np.pi * fc/fs)
+
+    sqrt_two = 2 ** 2
+    sqrt_v = 2 ** v
+
+    if kind == 1:
+        b1 = np.exp(-2.0 * np.pi * fc / fs)
+        return 1.0 - b1, 0, 0, -b1, 0
+    elif kind == 2:
+        b1 = -np.exp(-2.0 * np.pi * (0.5 - fc / fs))
+        return 1.0 + b1, 0, 0, -b1, 0
+    elif kind == 3:
+        norm = 1 / (1 / k + 1)
+        return norm, norm, 0, (1 - 1 / k) * norm, 0
+    elif kind == 4:
+        norm = 1 / (k + 1)
+        return norm, -norm, 0, (k - 1) * norm, 0
+    elif kind in (5, 6, 7, 8, 14):
+        norm = 1 / (1 + k / q + k * k)
+        b1 = 2 * (k * k - 1) * norm
+        b2 = (1 - k / q + k * k) * norm
+        if kind == 5:
+            a0 = k * k * norm
+            return a0, 2 * a0, a0, b1, b2
+        elif kind == 6:
+            return norm, -2 * norm, norm, b1, b2
+        elif kind == 7:
+            a0 = k / q * norm
+            return a0, 0, -a0, b1, b2
+        elif kind == 8:
+            a0 = (1 + k * k) * norm
+            return a0, b1, a0, b1, b2
+        return b2, b1, 1, b1, b2
+    elif kind == 9:
+        boost_norm = 1 / (1 + 1 / q * k + k * k)
+        cut_norm = 1 / (1 + v / q * k + k * k)
+        return _pick(boost,
+                     ((1 + v / q * k + k * k) * boost_norm, 2 * (k * k - 1) * boost_norm,
+                      (1 - v / q * k + k * k) * boost_norm, 2 * (k * k - 1) * boost_norm,
+                      (1 - 1 / q * k + k * k) * boost_norm),
+                     ((1 + 1 / q * k + k * k) * cut_norm, 2 * (k * k - 1) * cut_norm,
+                      (1 - 1 / q * k + k * k) * cut_norm, 2 * (k * k - 1) * cut_norm,
+                      (1 - v / q * k + k * k) * cut_norm))
+    elif kind == 10:
+        boost_norm = 1 / (1 + sqrt_two * k + k * k)
+        cut_norm = 1 / (1 + sqrt_v * k + v * k * k)
+        return _pick(boost,
+                     ((1 + sqrt_v * k + v * k * k) * boost_norm, 2 * (v * k * k - 1) * boost_norm,
+                      (1 - sqrt_v * k + v * k * k) * boost_norm, 2 * (k * k - 1) * boost_norm,
+                      (1 - sqrt_two * k + k * k) * boost_norm),
+                     ((1 + sqrt_two * k + k * k) * cut_norm, 2 * (k * k - 1) * cut_norm,
+                      (1 - sqrt_two * k + k * k) * cut_norm, 2 * (v * k * k - 1) * cut_norm,
+                      (1 - sqrt_v * k + v * k * k) * cut_norm))
+    elif kind == 11:
+        boost_norm = 1 / (1 + sqrt_two * k + k * k)
+        cut_norm = 1 / (v + sqrt_v * k + k * k)
+        return _pick(boost,
+                     ((v + sqrt_v * k + k * k) * boost_norm, 2 * (k * k - v) * boost_norm,
+                      (v - sqrt_v * k + k * k) * boost_norm, 2 * (k * k - 1) * boost_norm,
+                      (1 - sqrt_two * k + k * k) * boost_norm),
+                     ((1 + sqrt_two * k + k * k) * cut_norm, 2 * (k * k - 1) * cut_norm,
+                      (1 - sqrt_two * k + k * k) * cut_norm, 2 * (k * k - v) * cut_norm,
+                      (v - sqrt_v * k + k * k) * cut_norm))
+    elif kind == 12:
+        boost_norm = 1 / (k + 1)
+        cut_norm = 1 / (k * v + 1)
+        return _pick(boost,
+                     ((k * v + 1) * boost_norm, (k * v - 1) * boost_norm, 0, (k - 1) * boost_norm, 0),
+                     ((k + 1) * cut_norm, (k - 1) * cut_norm, 0, (k * v - 1) * cut_norm, 0))
+    elif kind == 13:
+        boost_norm = 1 / (k + 1)
+        cut_norm = 1 / (k + v)
+        return _pick(boost,
+                     ((k + v) * boost_norm, (k - v) * boost_norm, 0, (k - 1) * boost_norm, 0),
+                     ((k + 1) * cut_norm, (k - 1) * cut_norm, 0, (k - v) * cut_norm, 0))
+
+    a0 = (1 - k) / (1 + k)
+    return a0, -1, 0, -a0, 0
+
+
+def _pick(boost, boost_coeffs, cut_coeffs):
+    """ choose the boost or cut design per point """
+    return tuple(np.where(boost, pos, neg) for pos, neg in zip(boost_coeffs, cut_coeffs))
 
-    for i in range(len(signal)):
-        out[i] = signal[i] + params[0] * signal[i] + params[1] * xz1 + params[2] * xz2 - \
-                 params[3] * yz1 - params[4] * yz2
-        yz2 = yz1
-        yz1 = out[i]
-        xz2 = xz1
-        xz1 = signal[i]
 
-    return out
+#####################################################
+#
+# Modulated filters
+#    fc, q and peak_gain may be scalars or trajectories of any length (e.g. one
+#    value per sample from an LFO); trajectories are resampled to one value per
+#    control block, designed in one vectorized call, and applied by
+#    modulated_filter with the state carried across every change.
+#
+#####################################################
+
+
+def modulated_bi_quad(samples, kind, fs, fc, q, peak_gain=0.0, control_block=32, out=None):
+    """ bi_quad_coeffs design of the given kind with time-varying fc / q / peak_gain """
+    n = np.shape(samples)[-1]
+    coeffs = bi_quad_coeffs(kind, _control_trajectory(fc, n, control_block), fs,
+                            _control_trajectory(q, n, control_block),
+                            _control_trajectory(peak_gain, n, control_block))
+    y, _ = modulated_filter(samples, coeffs, control_block, out=out)
+    return y
+
+
+def modulated_second_order_lowpass(samples, fs, fc, q, control_block=32, out=None):
+    """ second order LPF (kLPF2) with time-varying fc / q """
+    n = np.shape(samples)[-1]
+    a0, a1, a2, b1, b2, c0, d0 = second_order_lowpass_coefficients(
+        fs, _control_trajectory(fc, n, control_block), _control_trajectory(q, n, control_block))
+    coeffs = _coefficients(d0 + c0 * a0, c0 * a1, c0 * a2, c0 * b1, c0 * b2)
+    y, _ = modulated_filter(samples, coeffs, control_block, out=out)
+    return y
 
 
 #####################################################
@@ -132,12 +438,18 @@ class DcBlocker:
     """
     DC blocking filter from https://ccrma.stanford.edu/~jos/filters/DC_Blocker.html
     Defaults to pole = 0.995 - see website for rationale.
+
+    By default process() appends to output_signal and returns the whole history.
+    With streaming=True it returns only the current block as an array and keeps
+    nothing but x1/y1, so memory stays flat on an endless stream.
     """
-    def __init__(self):
+    def __init__(self, streaming=False):
+        self.streaming = streaming
         self.pole = 0.995
         self.x1 = 0
         self.y1 = 0
         self.output_signal = []
+        self._buffer = None
 
     def __str__(self):
         return f"pole = {self.pole}, x1 = {self.x1}, y1 = {self.y1}, out = {self.output_signal}"
@@ -151,11 +463,128 @@ class DcBlocker:
     def set_pole(self, pole):
         self.pole = pole
 
-    def process(self, input_signal):
-        for x in input_signal:
-            y = x - self.x1 + self.pole * self.y1
-            self.output_signal.append(y)
-            self.x1 = x
-            self.y1 = y
+    def process(self, input_signal, out=None, in_place=False):
+        """ filter a 1-D or (n_channels, n_samples) block; each channel keeps its own x1/y1
+        :param input_signal: The block to filter
+        :param out: (streaming) array to write the block into
+        :param in_place: (streaming) overwrite input_signal, which must be a float array
+        :return: the accumulated output, or in streaming mode this block only. Without
+                 out or in_place the block lands in an internal buffer that the next call
+                 reuses, so copy it if it has to outlive that call.
+        """
+        x = np.asarray(input_signal)
+        if not _is_float32(x):
+            x = x.astype(float, copy=False)
+        if x.shape[-1] == 0:
+            return x if self.streaming else self.output_signal
+
+        y = self._filter(x)
+
+        if self.streaming:
+            if in_place:
+                out = input_signal
+            elif out is None:
+                if self._buffer is None or self._buffer.shape != x.shape or self._buffer.dtype != x.dtype:
+                    self._buffer = np.empty(x.shape, dtype=x.dtype)
+                out = self._buffer
+            np.copyto(out, y)
+            return out
+
+        if x.ndim == 1:
+            self.output_signal.extend(y.tolist())
+        elif len(self.output_signal) == 0:
+            self.output_signal = y
+        else:
+            self.output_signal = np.concatenate((self.output_signal, y), axis=-1)
 
         return self.output_signal
+
+    def _filter(self, x):
+        # the (x1, y1) pair is the transposed direct form state -x1 + pole * y1
+        zi = self.pole * np.asarray(self.y1, dtype=float) - np.asarray(self.x1, dtype=float)
+        zi = np.broadcast_to(zi, x.shape[:-1])[..., np.newaxis]
+        y, _ = iir_filter(x, [1.0, -1.0], _coefficients(1.0, -np.asarray(self.pole)), zi)
+        self.x1 = x[..., -1].copy()
+        self.y1 = y[..., -1].copy()
+        return y
+
+
+class Biquad:
+    """
+    Streaming biquad built from the [a0, a1, a2, b1, b2] list that bi_quad_coeffs
+    returns ('a' in the numerator, as on earlevel.com), or one such row per channel.
+    The z^-1/z^-2 state is kept between calls to process, so a signal gives
+    bit-identical output whether it goes in as one array or as blocks of any size.
+    """
+    def __init__(self, params):
+        self.b = np.zeros(3)
+        self.a = np.ones(3)
+        self.z = None
+        self.set_params(params)
+
+    def __str__(self):
+        return f"b = {self.b}, a = {self.a}, z = {self.z}"
+
+    def reset(self):
+        self.z = None
+
+    def set_params(self, params):
+        """ swap in new [a0, a1, a2, b1, b2] coefficients without clearing the state """
+        p = np.asarray(params, dtype=float)
+        self.b = p[..., 0:3].copy()
+        self.a = _coefficients(1.0, p[..., 3], p[..., 4])
+
+    def process(self, block, out=None):
+        """ filter a 1-D or (n_channels, n_samples) block, carrying the state into the next call
+        (into out, if given) """
+        y, self.z = iir_filter(block, self.b, self.a, self.z)
+        return into(out, y)
+
+
+class BiquadCascade:
+    """
+    Chain of biquads, each given as an [a0, a1, a2, b1, b2] list, run as one unit.
+    All sections are applied in a single fused pass per block (no intermediate
+    array per stage), and the state of every section is carried between calls.
+    """
+    def __init__(self, sections):
+        self.sos = np.zeros((len(sections), 6))
+        self.z = None
+        for index, params in enumerate(sections):
+            self.set_section(index, params)
+
+    def __str__(self):
+        return f"sos = {self.sos}, z = {self.z}"
+
+    def __len__(self):
+        return len(self.sos)
+
+    def reset(self):
+        self.z = None
+
+    def set_section(self, index, params):
+        """ swap in new [a0, a1, a2, b1, b2] coefficients for one section, keeping all state """
+        self.sos[index] = [params[0], params[1], params[2], 1.0, params[3], params[4]]
+
+    def process(self, block, out=None):
+        """ filter a 1-D or (n_channels, n_samples) block, carrying the state into the next call
+        (into out, if given) """
+        y, self.z = sos_filter(block, self.sos, self.z)
+        return into(out, y)
+
+
+class ParametricEQ(BiquadCascade):
+    """
+    BiquadCascade designed from a list of (kind, fc, q, gain) bands, where kind
+    is one of the bi_quad_coeffs kinds (e.g. 9 = peak, 10 = low shelf).
+    Coefficients are built once; set_band redesigns a single band.
+    """
+    def __init__(self, fs, bands):
+        self.fs = fs
+        self.bands = [tuple(band) for band in bands]
+        super().__init__([bi_quad_coeffs(kind, fc, fs, q, gain) for kind, fc, q, gain in self.bands])
+
+    def set_band(self, index, kind, fc, q, gain):
+        """ redesign one band; the other sections and all filter state are untouched """
+        self.bands[index] = (kind, fc, q, gain)
+        self.set_section(index, bi_quad_coeffs(kind, fc, self.fs, q, gain))
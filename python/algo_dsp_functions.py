@@ -3,12 +3,28 @@ Functions useful in many contexts are collected in this file.
 """
 
 
-# def first_order_linear_interpolator(i, k, arr):
-#     """
-#     :param i: current index
-#     :param k: current array index
-#     :param arr: array
-#     :return: The weighted sum of wave table values at
-#              curr_idx and curr_idx+1.
-#     """
-#     return (k - i) * arr[i + 1] + (i + 1 - k) * arr[i]
+def first_order_linear_interpolator(i, k, arr):
+    """
+    :param i: current index (integer part of k); an int or an int array
+    :param k: current array index (fractional position); a float or a float array
+    :param arr: array
+    :return: The weighted sum of wave table values at
+             curr_idx and curr_idx+1.
+    """
+    return (k - i) * arr[i + 1] + (i + 1 - k) * arr[i]
+
+
+def third_order_hermite_interpolator(i, k, arr):
+    """
+    4-point, 3rd-order Hermite (Catmull-Rom) interpolation.
+    :param i: current index (integer part of k); arr[i - 1] and arr[i + 2] must exist
+    :param k: current array index (fractional position)
+    :param arr: array
+    :return: The curve through arr[i - 1] .. arr[i + 2] evaluated at k.
+    """
+    f = k - i
+    xm1, x0, x1, x2 = arr[i - 1], arr[i], arr[i + 1], arr[i + 2]
+    c1 = 0.5 * (x1 - xm1)
+    c2 = xm1 - 2.5 * x0 + 2.0 * x1 - 0.5 * x2
+    c3 = 0.5 * (x2 - xm1) + 1.5 * (x0 - x1)
+    return ((c3 * f + c2) * f + c1) * f + x0
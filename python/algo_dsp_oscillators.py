@@ -0,0 +1,108 @@
+import numpy as np
+
+from util_buffers import into
+
+#####################################################
+#
+# Additive oscillator bank
+#
+#    Each partial is a unit complex phasor that is rotated, not recomputed:
+#    a block is the (partials x samples) table of rotations r_k^n applied to
+#    the current phasors, summed over partials as one matrix-vector product.
+#    The table is built with cumulative products (no sin/cos per sample) and
+#    is reused for as long as the frequencies stay the same. Blocks are
+#    rendered SUB_BLOCK samples at a time, the phasors advanced between
+#    sub-blocks, so the table - and the working memory - stays partials x
+#    SUB_BLOCK whatever the block size.
+#
+#####################################################
+
+SUB_BLOCK = 128
+
+
+class OscillatorBank:
+    """
+    Sum of sinusoidal partials, a_k * sin(2 * pi * f_k * t + phase_k), rendered
+    block by block with the phase of every partial carried between calls.
+    """
+    def __init__(self, fs, freqs, amps, phases=None):
+        self.fs = fs
+        self.freqs = np.array(freqs, dtype=float)
+        self.amps = np.broadcast_to(np.asarray(amps, dtype=float), self.freqs.shape).copy()
+        if phases is None:
+            phases = np.zeros(self.freqs.shape)
+        # sin(theta) is the real part of exp(j * (theta - pi / 2))
+        self.phasors = np.exp(1j * (np.asarray(phases, dtype=float) - np.pi / 2))
+        self._rotations = {}
+        self._rotations_key = None
+
+    def __str__(self):
+        return f"partials = {len(self.freqs)}, fs = {self.fs}"
+
+    def __len__(self):
+        return len(self.freqs)
+
+    def set_frequencies(self, freqs):
+        self.freqs = np.array(freqs, dtype=float)
+
+    def set_amplitudes(self, amps):
+        self.amps = np.broadcast_to(np.asarray(amps, dtype=float), self.freqs.shape).copy()
+
+    def process(self, n_samples, freqs=None, amps=None, out=None):
+        """ Render the next block
+        :param n_samples: block length
+        :param freqs: optional target frequencies, glided to linearly across this block
+        :param amps: optional target amplitudes, ramped to linearly across this block
+        :param out: optional array to render into
+        :return: the block as a 1-D array
+        """
+        w_start = 2 * np.pi * self.freqs / self.fs
+        w_step = 0.0 if freqs is None else (2 * np.pi * np.asarray(freqs, dtype=float) / self.fs - w_start) / n_samples
+        if amps is not None:
+            amps = np.broadcast_to(np.asarray(amps, dtype=float), self.freqs.shape)
+            amps_step = amps - self.amps
+
+        y = np.empty(n_samples)
+        for start in range(0, n_samples, SUB_BLOCK):
+            n = min(SUB_BLOCK, n_samples - start)
+            rotations, rotation = self._rotation_table(w_start + w_step * start, w_step, n)
+            y[start:start + n] = np.real((self.amps * self.phasors) @ rotations)
+            if amps is not None:
+                ramp = (start + np.arange(n)) / n_samples
+                y[start:start + n] += ramp * np.real((amps_step * self.phasors) @ rotations)
+            self.phasors *= rotation
+            self.phasors /= np.abs(self.phasors)  # keep rounding from creeping into the magnitude
+
+        if amps is not None:
+            self.amps = amps.copy()
+        if freqs is not None:
+            self.freqs = np.array(freqs, dtype=float)
+        return into(out, y)
+
+    def _rotation_table(self, w, w_step, n_samples):
+        """ r_k^n for n = 0..n_samples-1 starting from step w (which grows by w_step per sample),
+        and the rotation across all n_samples """
+        gliding = np.any(w_step != 0.0)
+        if not gliding:
+            if self._rotations_key != w.tobytes():
+                self._rotations, self._rotations_key = {}, w.tobytes()
+            if n_samples in self._rotations:
+                return self._rotations[n_samples]
+
+        steps = np.empty((len(w), n_samples), dtype=complex)
+        steps[:] = np.exp(1j * w)[:, np.newaxis]
+        if gliding:
+            # the per-sample step itself rotates, giving a linear frequency glide
+            chirp = np.empty(steps.shape, dtype=complex)
+            chirp[:, 0] = 1.0
+            chirp[:, 1:] = np.exp(1j * w_step)[:, np.newaxis]
+            steps *= np.cumprod(chirp, axis=1)
+
+        rotations = np.empty(steps.shape, dtype=complex)
+        rotations[:, 0] = 1.0
+        np.cumprod(steps[:, :-1], axis=1, out=rotations[:, 1:])
+        table = (rotations, rotations[:, -1] * steps[:, -1])
+
+        if not gliding:
+            self._rotations[n_samples] = table
+        return table
@@ -0,0 +1,182 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+from algo_dsp_filters import iir_filter, sos_filter
+
+#####################################################
+#
+# Parallel rendering of long signals through IIR filters
+#
+#    A recursive filter is sequential, but it is linear: the output of a
+#    segment is its zero-state output plus the zero-input response of the
+#    state it inherits. So:
+#      1. the signal is cut into segments and every segment is filtered from
+#         zero state on a worker process
+#      2. the true state at each boundary follows from the zero-state final
+#         states: z[k+1] = f[k] + A^L z[k], with A the one-sample state
+#         transition matrix (the recursion over segments is a handful of
+#         small matrix products)
+#      3. each worker adds the zero-input response of its true starting
+#         state to its segment; that response decays like r^n for pole radius
+#         r, so only the first `settle` samples (where r^n reaches 2**-70,
+#         capped at the segment length) need to be computed
+#    Signal and output live in shared memory; only coefficients and states
+#    are pickled. The result matches iir_filter / sos_filter to within a few
+#    ULPs of the signal peak, and the returned zf can be carried on as usual.
+#
+#    Every filter in algo_dsp_filters is an iir_filter or sos_filter call:
+#        one_pole_filter(x, a0, b1)      parallel_iir_filter(x, [a0], [1, b1])
+#        bi_quad(x, [a0, a1, a2, b1, b2]) parallel_iir_filter(x, [1 + a0, a1, a2], [1, b1, b2])
+#        DcBlocker (pole p)              parallel_iir_filter(x, [1, -1], [1, -p])
+#        BiquadCascade / ParametricEQ    parallel_sos_filter(x, eq.sos)
+#
+#####################################################
+
+MIN_SEGMENT = 1 << 16
+SETTLE_BITS = 70
+
+
+def parallel_iir_filter(samples, b, a, zi=None, workers=None, segment_size=None):
+    """ iir_filter split over worker processes; returns (y, zf) as iir_filter does
+    :param samples: The input signal, 1-D or (n_channels, n_samples)
+    :param b: Feed-forward coefficients [b0, b1, ...] (one set for all channels)
+    :param a: Feedback coefficients [1, a1, a2, ...]
+    :param zi: State carried in from a previous call (None = zero state), shape (..., order)
+    :param workers: Worker processes (default: one per core)
+    :param segment_size: Samples per segment (default: one segment per worker, at least MIN_SEGMENT)
+    """
+    b = np.asarray(b, dtype=float)
+    a = np.asarray(a, dtype=float)
+    if b.ndim > 1 or a.ndim > 1:
+        raise ValueError("parallel_iir_filter takes one coefficient set; filter channel groups separately")
+    return _parallel(samples, 'ba', (b, a), zi, workers, segment_size)
+
+
+def parallel_sos_filter(samples, sos, zi=None, workers=None, segment_size=None):
+    """ sos_filter split over worker processes; returns (y, zf) as sos_filter does
+    :param sos: One row [b0, b1, b2, 1, a1, a2] per section
+    :param zi: State carried in from a previous call (None = zero state), shape (n_sections, ..., 2)
+    (other parameters as parallel_iir_filter)
+    """
+    return _parallel(samples, 'sos', (np.asarray(sos, dtype=float),), zi, workers, segment_size)
+
+
+def _parallel(samples, kind, coeffs, zi, workers, segment_size):
+    x = np.asarray(samples)
+    if x.dtype != np.float32:
+        x = x.astype(float, copy=False)
+    n = x.shape[-1]
+    workers = workers or os.cpu_count()
+    segment_size = segment_size or max(MIN_SEGMENT, -(-n // workers))
+    if workers == 1 or n <= segment_size:
+        return _run(kind, coeffs, x, zi)
+
+    starts = list(range(0, n, segment_size))
+    stops = starts[1:] + [n]
+    channels = x.shape[:-1]
+    transition = _transition(kind, coeffs, channels)
+    settle = _settle(transition)
+
+    with _SharedArrays(x) as shared, ProcessPoolExecutor(max_workers=workers) as pool:
+        final = list(pool.map(_segment_pass, [(kind, coeffs, shared.spec, start, stop, None, 0)
+                                              for start, stop in zip(starts, stops)]))
+
+        z = np.zeros(channels + (len(transition),)) if zi is None else _flat(kind, np.asarray(zi, dtype=float))
+        initial = []
+        powers = {}
+        for start, stop, f in zip(starts, stops, final):
+            initial.append(z)
+            if stop - start not in powers:
+                powers[stop - start] = np.linalg.matrix_power(transition, stop - start)
+            z = _flat(kind, f) + z @ powers[stop - start].T
+
+        corrections = [(kind, coeffs, shared.spec, start, stop, _unflat(kind, z0), settle)
+                       for start, stop, z0 in zip(starts, stops, initial) if zi is not None or start > 0]
+        list(pool.map(_segment_pass, corrections))
+        y = np.array(shared.y)
+
+    return y, _unflat(kind, z)
+
+
+def _run(kind, coeffs, x, zi):
+    if kind == 'ba':
+        return iir_filter(x, coeffs[0], coeffs[1], zi)
+    return sos_filter(x, coeffs[0], zi)
+
+
+def _flat(kind, z):
+    """ engine state layout -> (..., n_states) """
+    if kind == 'ba':
+        return z
+    z = np.moveaxis(z, 0, -2)
+    return z.reshape(z.shape[:-2] + (-1,))
+
+
+def _unflat(kind, z):
+    """ (..., n_states) -> engine state layout """
+    if kind == 'ba':
+        return z
+    return np.moveaxis(z.reshape(z.shape[:-1] + (-1, 2)), -2, 0)
+
+
+def _transition(kind, coeffs, channels):
+    """ A with z[n+1] = A z[n] when the input is zero, found by stepping each unit state once """
+    if kind == 'ba':
+        size = max(len(coeffs[0]), len(coeffs[1])) - 1
+    else:
+        size = 2 * len(coeffs[0])
+    _, stepped = _run(kind, coeffs, np.zeros((size, 1)), _unflat(kind, np.eye(size)))
+    return _flat(kind, stepped).T
+
+
+def _settle(transition):
+    """ samples until the zero-input response has decayed by 2**-SETTLE_BITS (None: never) """
+    if len(transition) == 0:
+        return 0
+    radius = np.max(np.abs(np.linalg.eigvals(transition)))
+    if radius >= 1.0:
+        return None
+    if radius == 0.0:
+        return len(transition)
+    return int(np.ceil(-SETTLE_BITS * np.log(2.0) / np.log(radius))) + len(transition)
+
+
+def _segment_pass(job):
+    """ worker: zero-state filtering of a segment (zi None), or adding the response to state zi """
+    kind, coeffs, spec, start, stop, zi, settle = job
+    blocks = [SharedMemory(name=name) for name, _, _ in spec]
+    views = [np.ndarray(shape, dtype, buffer=block.buf) for block, (_, shape, dtype) in zip(blocks, spec)]
+    try:
+        x, y = views
+        if zi is None:
+            y[..., start:stop], zf = _run(kind, coeffs, x[..., start:stop], None)
+            return zf
+        stop = stop if settle is None else min(stop, start + settle)
+        response, _ = _run(kind, coeffs, np.zeros(x.shape[:-1] + (stop - start,)), zi)
+        y[..., start:stop] += response
+        return None
+    finally:
+        del x, y, views
+        for block in blocks:
+            block.close()
+
+
+class _SharedArrays:
+    """ the input and an output of the same shape and dtype in shared memory, freed on exit """
+    def __init__(self, x):
+        self._blocks = [SharedMemory(create=True, size=max(x.nbytes, 1)) for _ in range(2)]
+        self.x, self.y = [np.ndarray(x.shape, x.dtype, buffer=block.buf) for block in self._blocks]
+        self.x[...] = x
+        self.spec = [(block.name, x.shape, x.dtype.str) for block in self._blocks]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        del self.x, self.y
+        for block in self._blocks:
+            block.close()
+            block.unlink()
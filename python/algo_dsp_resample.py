@@ -0,0 +1,143 @@
+from fractions import Fraction
+from functools import lru_cache
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+#####################################################
+#
+# Polyphase sample-rate conversion
+#
+#    fs_out / fs_in is reduced to up / down. Conceptually the input is
+#    zero-stuffed by up, low-pass filtered by a Kaiser-windowed sinc and kept
+#    every down-th sample; the polyphase table holds the up phases of that
+#    filter so only the non-zero products are ever computed. Output m sits at
+#    input time m * down / up exactly (the filter is centred, so there is no
+#    delay to trim), and the last inputs it needs arrive half a filter later.
+#
+#    Tables are cached per (up, down, half_width, cutoff, beta) and read-only.
+#    Outputs are computed OUTPUT_CHUNK at a time, so the gathered input
+#    windows stay a fixed size however long the signal is.
+#
+#####################################################
+
+HALF_WIDTH = 16
+CUTOFF = 0.95
+BETA = 8.0
+MAX_RATIO_TERM = 4096
+OUTPUT_CHUNK = 4096
+
+
+def rate_ratio(fs_in, fs_out):
+    """ (up, down) in lowest terms """
+    ratio = Fraction(fs_out) / Fraction(fs_in)
+    if max(ratio.numerator, ratio.denominator) > MAX_RATIO_TERM:
+        raise ValueError(f"{fs_in} -> {fs_out} reduces to {ratio.numerator}/{ratio.denominator}, "
+                         f"terms above {MAX_RATIO_TERM} need too large a filter table")
+    return ratio.numerator, ratio.denominator
+
+
+def polyphase_table(up, down, half_width=HALF_WIDTH, cutoff=CUTOFF, beta=BETA):
+    """ (up, taps) table; row p holds filter taps p, p + up, p + 2 * up, ... newest input last
+    :param half_width: zero crossings of the sinc on each side, at the lower of the two rates
+    :param cutoff: passband edge as a fraction of the lower Nyquist frequency
+    :param beta: Kaiser window shape (8 gives about 80 dB stopband)
+    """
+    return _polyphase_table(up, down, half_width, float(cutoff), float(beta))
+
+
+@lru_cache(maxsize=32)
+def _polyphase_table(up, down, half_width, cutoff, beta):
+    rate = max(up, down)
+    n = 2 * half_width * rate + 1
+    i = np.arange(n) - half_width * rate
+    h = up * (cutoff / rate) * np.sinc(cutoff * i / rate) * np.kaiser(n, beta)
+
+    taps = -(-n // up)
+    table = np.zeros(taps * up)
+    table[:n] = h
+    table = np.ascontiguousarray(table.reshape(taps, up).T[:, ::-1])
+    table.flags.writeable = False
+    return table
+
+
+def resample(samples, fs_in, fs_out):
+    """ Convert a whole 1-D or (n_channels, n_samples) signal; returns ceil(n * up / down) samples """
+    resampler = Resampler(fs_in, fs_out)
+    return np.concatenate((resampler.process(samples), resampler.flush()), axis=-1)
+
+
+class Resampler:
+    """
+    Streaming polyphase resampler. process() takes blocks of any size (1-D or
+    (n_channels, n_samples)) and returns every output sample the input so far
+    allows; flush() returns the rest once the stream has ended. Joined up, the
+    outputs are identical whatever the block sizes. float32 in gives float32 out.
+    """
+    def __init__(self, fs_in, fs_out, half_width=HALF_WIDTH, cutoff=CUTOFF, beta=BETA):
+        self.fs_in = fs_in
+        self.fs_out = fs_out
+        self.up, self.down = rate_ratio(fs_in, fs_out)
+        self.table = polyphase_table(self.up, self.down, half_width, cutoff, beta)
+        self._center = half_width * max(self.up, self.down)
+        self.reset()
+
+    def __str__(self):
+        return f"{self.fs_in} -> {self.fs_out} (up {self.up}, down {self.down}, taps {self.table.shape[1]})"
+
+    def reset(self):
+        self.n_in = 0
+        self.n_out = 0
+        self._history = None
+        self._dtype = np.float64
+
+    def process(self, block, out=None):
+        """ feed the next block; returns the output samples it completes
+        :param out: optional array to write them into; the count varies from block to
+                    block, so it needs room for at least ceil(len(block) * up / down) + 1
+                    samples and the view out[..., :count] is returned """
+        x = np.asarray(block)
+        self._dtype = np.float32 if x.dtype == np.float32 else np.float64
+        taps = self.table.shape[1]
+        if self._history is None:
+            self._history = np.zeros(x.shape[:-1] + (taps - 1,))
+
+        extended = np.concatenate((self._history, x.astype(float, copy=False)), axis=-1)
+        available = self.n_in + x.shape[-1]
+
+        # output m needs inputs up to n = (m * down + center) // up
+        end = max(self.n_out, (available * self.up - 1 - self._center) // self.down + 1)
+        if out is None:
+            y = np.empty(x.shape[:-1] + (end - self.n_out,), dtype=self._dtype)
+        elif out.shape[-1] < end - self.n_out:
+            raise ValueError(f"out holds {out.shape[-1]} samples, this block completes {end - self.n_out}")
+        else:
+            y = out[..., :end - self.n_out]
+        if end > self.n_out:
+            windows = sliding_window_view(extended, taps, axis=-1)
+            for start in range(self.n_out, end, OUTPUT_CHUNK):
+                stop = min(end, start + OUTPUT_CHUNK)
+                m = np.arange(start, stop, dtype=np.int64) * self.down + self._center
+                phase, newest = m % self.up, m // self.up
+                y[..., start - self.n_out:stop - self.n_out] = np.einsum(
+                    '...ok,ok->...o', windows[..., newest - self.n_in, :], self.table[phase])
+
+        self._history = extended[..., extended.shape[-1] - (taps - 1):]
+        self.n_in = available
+        self.n_out = end
+        return y
+
+    def flush(self):
+        """ the remaining outputs, up to ceil(n_in * up / down) in all; then starts a new stream """
+        # nothing fed yet: no channel count to go on, so an empty 1-D block
+        shape = () if self._history is None else self._history.shape[:-1]
+        dtype = self._dtype
+        total = -(-self.n_in * self.up // self.down)
+        remaining = total - self.n_out
+        if remaining > 0:
+            needed = ((total - 1) * self.down + self._center) // self.up + 1 - self.n_in
+            y = self.process(np.zeros(shape + (max(needed, 0),), dtype=dtype))[..., :remaining]
+        else:
+            y = np.zeros(shape + (0,), dtype=dtype)
+        self.reset()
+        return y
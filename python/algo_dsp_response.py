@@ -0,0 +1,105 @@
+from functools import lru_cache
+
+import numpy as np
+
+#####################################################
+#
+# Frequency response
+#
+#    Compute-only: no printing, no figures. b and a are the numerator and
+#    denominator of H(z) = (b0 + b1 z^-1 + ...) / (1 + a1 z^-1 + ...), given
+#    either as one coefficient set or as (n_sets, n_taps) rows, which are all
+#    evaluated in a single matrix product.
+#
+#    freqs is a number of points (linear from 0 up to, not including, Nyquist,
+#    as scipy.signal.freqz) or any array of frequencies, e.g. log_frequencies.
+#    Frequencies are in Hz when fs is given, otherwise in rad/sample.
+#
+#    A single coefficient set is memoized on its coefficient tuple and grid,
+#    so re-evaluating the same design is a dictionary lookup; those results are
+#    read-only (take a .copy() to modify them).
+#
+#####################################################
+
+
+def log_frequencies(fs, n=512, low=20.0, high=None):
+    """ n log-spaced frequencies in Hz from low to high (default: just below fs/2) """
+    return np.geomspace(low, high or 0.5 * fs * (1.0 - 1.0 / n), n)
+
+
+def frequency_response(b, a=1.0, freqs=512, fs=None):
+    """ Complex response of one or many filters
+    :param b: Numerator coefficients, or one row per filter
+    :param a: Denominator coefficients, or one row per filter
+    :param freqs: Number of points, or the frequencies to evaluate
+    :param fs: Sample rate; None for frequencies in rad/sample
+    :return: (freqs, h), h shaped (n_freqs,) or (n_sets, n_freqs)
+    """
+    freqs, h, _ = _evaluate(b, a, freqs, fs)
+    return freqs, h
+
+
+def response(b, a=1.0, freqs=512, fs=None):
+    """ Magnitude, phase and group delay of one or many filters
+    :param b: Numerator coefficients, or one row per filter
+    :param a: Denominator coefficients, or one row per filter
+    :param freqs: Number of points, or the frequencies to evaluate
+    :param fs: Sample rate; None for frequencies in rad/sample
+    :return: (freqs, magnitude in dB, unwrapped phase in radians, group delay in samples)
+    """
+    b = np.asarray(b, dtype=float)
+    a = np.asarray(a, dtype=float)
+    grid = _grid(freqs, fs)
+    if b.ndim <= 1 and a.ndim <= 1:
+        return _response_cached(tuple(np.atleast_1d(b).tolist()), tuple(np.atleast_1d(a).tolist()),
+                                grid.tobytes(), fs)
+    return _response(b, a, grid, fs)
+
+
+def bi_quad_response(params, freqs=512, fs=None):
+    """ response() of [a0, a1, a2, b1, b2] rows as returned by bi_quad_coeffs ('a' in the numerator) """
+    p = np.asarray(params, dtype=float)
+    return response(p[..., 0:3], np.stack(np.broadcast_arrays(1.0, p[..., 3], p[..., 4]), axis=-1), freqs, fs)
+
+
+def _grid(freqs, fs):
+    """ frequencies in Hz or rad/sample, as a float array """
+    if np.ndim(freqs) == 0:
+        return np.arange(int(freqs)) * ((fs or 2 * np.pi) / (2 * int(freqs)))
+    return np.asarray(freqs, dtype=float)
+
+
+@lru_cache(maxsize=1024)
+def _response_cached(b, a, grid, fs):
+    result = _response(np.array(b), np.array(a), np.frombuffer(grid), fs)
+    for array in result:
+        array.flags.writeable = False
+    return result
+
+
+def _response(b, a, freqs, fs):
+    _, h, group_delay = _evaluate(b, a, freqs, fs)
+    with np.errstate(divide='ignore'):
+        magnitude = 20.0 * np.log10(np.abs(h))
+    return freqs.copy(), magnitude, np.unwrap(np.angle(h), axis=-1), group_delay
+
+
+def _evaluate(b, a, freqs, fs):
+    """ h and the group delay from one shared e^-jwk table """
+    b = np.atleast_1d(np.asarray(b, dtype=float))
+    a = np.atleast_1d(np.asarray(a, dtype=float))
+    freqs = _grid(freqs, fs)
+    w = freqs if fs is None else 2 * np.pi * freqs / fs
+
+    taps = np.arange(max(b.shape[-1], a.shape[-1]))
+    z = np.exp(-1j * np.outer(w, taps))
+    num = b @ z[:, :b.shape[-1]].T
+    den = a @ z[:, :a.shape[-1]].T
+
+    # group delay of a polynomial C is Re(sum(k c_k z^k) / C)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        h = num / den
+        group_delay = (((b * taps[:b.shape[-1]]) @ z[:, :b.shape[-1]].T) / num).real \
+            - (((a * taps[:a.shape[-1]]) @ z[:, :a.shape[-1]].T) / den).real
+
+    return freqs, h, group_delay
@@ -0,0 +1,157 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+#####################################################
+#
+# Spectrum analysis
+#
+#    Real-input FFTs only (the negative half of a real signal's spectrum is
+#    the mirror image of the positive half). SpectrumAnalyzer is fed blocks of
+#    any size and keeps only the samples that haven't made a whole frame yet,
+#    so signals can be longer than memory.
+#
+#    Magnitudes are scaled so that a full-scale sine centred on a bin reads
+#    1.0; PSDs are one-sided densities in units^2/Hz, as scipy.signal.welch
+#    with detrend=False.
+#
+#####################################################
+
+WINDOWS = {
+    'hann': np.hanning,
+    'hamming': np.hamming,
+    'blackman': np.blackman,
+    'rect': np.ones,
+}
+
+
+def window(name, size):
+    """ periodic (DFT-even) window, as scipy.signal.get_window returns for spectral analysis """
+    if name not in WINDOWS:
+        raise ValueError(f"unknown window '{name}', expected one of {list(WINDOWS)}")
+    return WINDOWS[name](size + 1)[:-1]
+
+
+def magnitude_spectrum(sig, fs, window_name='rect'):
+    """ One-sided magnitude spectrum of a whole signal
+    :param sig: 1-D or (n_channels, n_samples) signal
+    :param fs: sample rate
+    :return: (freqs, magnitude)
+    """
+    sig = np.asarray(sig, dtype=float)
+    w = window(window_name, sig.shape[-1])
+    return np.fft.rfftfreq(sig.shape[-1], 1.0 / fs), np.abs(np.fft.rfft(sig * w)) * _amplitude_scale(w)
+
+
+def _amplitude_scale(w):
+    """ per-bin factor giving a bin-centred sine of amplitude 1 a magnitude of 1 """
+    scale = np.full(len(w) // 2 + 1, 2.0 / np.sum(w))
+    scale[0] /= 2
+    if len(w) % 2 == 0:
+        scale[-1] /= 2
+    return scale
+
+
+class SpectrumAnalyzer:
+    """
+    Block-fed STFT with running Welch PSD and peak hold.
+
+    process(block) returns the magnitude spectra of the frames completed by that
+    block, (n_frames, n_bins) or (n_channels, n_frames, n_bins); the array is a
+    buffer the next call reuses, so copy it if it has to outlive that call.
+    The windowed frames, power and density arrays are reused the same way; the
+    FFT output and the join of the leftover samples with the new block are
+    still allocated per call.
+
+    hop may be larger than fft_size: the samples between frames are skipped,
+    across block boundaries if need be.
+
+    With averaging=None the PSD is the mean over every frame so far (Welch);
+    with a number in (0, 1] each frame is blended in with that weight, so the
+    estimate follows a changing signal.
+    """
+    def __init__(self, fs, fft_size=4096, hop=None, window_name='hann', averaging=None):
+        self.fs = fs
+        self.fft_size = fft_size
+        self.hop = hop or fft_size // 2
+        self.window = window(window_name, fft_size)
+        self.averaging = averaging
+        self.freqs = np.fft.rfftfreq(fft_size, 1.0 / fs)
+        self._scale = _amplitude_scale(self.window)
+        # |X|^2 -> one-sided density
+        self._density = np.where((self.freqs > 0) & (self.freqs < fs / 2), 2.0, 1.0) / (
+            fs * np.sum(self.window ** 2))
+        self._frames = None
+        self._spectra = None
+        self._power = None
+        self._psd_frames = None
+        self.reset()
+
+    def __str__(self):
+        return f"fs = {self.fs}, fft_size = {self.fft_size}, hop = {self.hop}, frames = {self.n_frames}"
+
+    def reset(self):
+        self.n_frames = 0
+        self.psd = None
+        self.peak = None
+        self._pending = None
+        self._skip = 0
+
+    def reset_peak(self):
+        self.peak = None
+
+    def process(self, block):
+        """ feed a 1-D or (n_channels, n_samples) block; returns the new frames' magnitudes """
+        block = np.asarray(block, dtype=float)
+        if self._skip:
+            skipped = min(self._skip, block.shape[-1])
+            block = block[..., skipped:]
+            self._skip -= skipped
+        x = block if self._pending is None else np.concatenate((self._pending, block), axis=-1)
+
+        n_new = 0 if x.shape[-1] < self.fft_size else (x.shape[-1] - self.fft_size) // self.hop + 1
+        # the next frame starts at n_new * hop, which is past the end of x when hop > fft_size
+        self._pending = x[..., n_new * self.hop:].copy()
+        self._skip += max(0, n_new * self.hop - x.shape[-1])
+        if n_new == 0:
+            return np.empty(x.shape[:-1] + (0, len(self.freqs)))
+
+        frames = self._buffer('_frames', x.shape[:-1] + (n_new, self.fft_size), float)
+        np.multiply(sliding_window_view(x, self.fft_size, axis=-1)[..., ::self.hop, :][..., :n_new, :],
+                    self.window, out=frames)
+        spectrum = np.fft.rfft(frames, axis=-1)
+        power = self._buffer('_power', spectrum.shape, float)
+        np.multiply(spectrum.real, spectrum.real, out=power)
+        power += spectrum.imag ** 2
+
+        spectra = self._buffer('_spectra', power.shape, float)
+        np.sqrt(power, out=spectra)
+        spectra *= self._scale
+
+        self._accumulate(np.multiply(power, self._density, out=self._buffer('_psd_frames', power.shape, float)),
+                         spectra)
+        return spectra
+
+    def _accumulate(self, psd_frames, spectra):
+        peak = spectra.max(axis=-2)
+        self.peak = peak if self.peak is None else np.maximum(self.peak, peak)
+
+        n_new = psd_frames.shape[-2]
+        if self.averaging is None:
+            total = psd_frames.sum(axis=-2)
+            if self.psd is None:
+                self.psd = total / n_new
+            else:
+                self.psd = (self.psd * self.n_frames + total) / (self.n_frames + n_new)
+        else:
+            for k in range(n_new):
+                frame = psd_frames[..., k, :]
+                self.psd = frame.copy() if self.psd is None else self.psd + self.averaging * (frame - self.psd)
+        self.n_frames += n_new
+
+    def _buffer(self, name, shape, dtype):
+        """ reuse the named work array when the shape repeats, as it does for a fixed block size """
+        buffer = getattr(self, name)
+        if buffer is None or buffer.shape != shape:
+            buffer = np.empty(shape, dtype=dtype)
+            setattr(self, name, buffer)
+        return buffer
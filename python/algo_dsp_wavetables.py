@@ -1,41 +1,142 @@
+from functools import lru_cache
+
 import numpy as np
 
+from algo_dsp_functions import first_order_linear_interpolator, third_order_hermite_interpolator
+from util_buffers import into
+
 #####################################################
 #
 # Wave-table oscillators
+#    based on https://www.earlevel.com/main/2012/05/04/a-wavetable-oscillator-part-1/
+#
+#    One band-limited table is built per octave of fundamental frequency
+#    (a mipmap); each table only holds the harmonics that stay below fs/2 for
+#    the highest fundamental in its octave. Shapes match the scipy-based
+#    util_waveforms versions (e.g. the saw rises from -1 to 1).
 #
 #####################################################
 
 
-# class DcBlocker:
-#     """
-#     DC blocking filter from https://ccrma.stanford.edu/~jos/filters/DC_Blocker.html
-#     Defaults to pole = 0.995 - see website for rationale.
-#     """
-    # def __init__(self):
-    #     self.pole = 0.995
-    #     self.x1 = 0
-    #     self.y1 = 0
-    #     self.output_signal = []
-    #
-    # def __str__(self):
-    #     return f"pole = {self.pole}, x1 = {self.x1}, y1 = {self.y1}, out = {self.output_signal}"
-    #
-    # def reset(self):
-    #     self.pole = 0.995
-    #     self.x1 = 0
-    #     self.y1 = 0
-    #     self.output_signal = []
-    #
-    # def set_pole(self, pole):
-    #     self.pole = pole
-    #
-    # def process(self, input_signal):
-    #     for x in input_signal:
-    #         y = x - self.x1 + self.pole * self.y1
-    #         self.output_signal.append(y)
-    #         self.x1 = x
-    #         self.y1 = y
-    #
-    #     return self.output_signal
+WAVETABLE_SIZE = 2048
+LOWEST_FREQUENCY = 20.0
+
+
+def _harmonic_amplitudes(waveform, n_harmonics):
+    """ sine-series (b_k) and cosine-series (a_k) amplitudes for harmonics 1..n_harmonics """
+    k = np.arange(1, n_harmonics + 1)
+    odd = (k % 2) == 1
+    sin_amps = np.zeros(n_harmonics)
+    cos_amps = np.zeros(n_harmonics)
+
+    if waveform == 'sine':
+        sin_amps[0] = 1.0
+    elif waveform == 'saw':
+        sin_amps = -2.0 / (np.pi * k)
+    elif waveform == 'square':
+        sin_amps = np.where(odd, 4.0 / (np.pi * k), 0.0)
+    elif waveform == 'triangle':
+        cos_amps = np.where(odd, -8.0 / (np.pi * k) ** 2, 0.0)
+    else:
+        raise ValueError(f"unknown waveform '{waveform}', expected sine, saw, square or triangle")
+
+    return sin_amps, cos_amps
+
+
+@lru_cache(maxsize=None)
+def mipmap_tables(waveform, fs, table_size=WAVETABLE_SIZE):
+    """ Band-limited tables, one per octave above LOWEST_FREQUENCY
+    :param waveform: 'sine', 'saw', 'square' or 'triangle'
+    :param fs: sample rate
+    :param table_size: samples per cycle
+    :return: (n_octaves, table_size + 3) array; each row is one cycle with one
+             wrapped guard sample in front and two behind, so an interpolator can
+             read rows[o, i - 1 .. i + 2] without wrapping. The result is cached
+             and read-only.
+    """
+    n_octaves = max(1, int(np.ceil(np.log2((fs / 2.0) / LOWEST_FREQUENCY))))
+    tables = np.empty((n_octaves, table_size + 3))
+
+    for octave in range(n_octaves):
+        top_frequency = LOWEST_FREQUENCY * 2.0 ** (octave + 1)
+        n_harmonics = int(max(1, min(table_size // 2 - 1, (fs / 2.0) // top_frequency)))
+        sin_amps, cos_amps = _harmonic_amplitudes(waveform, n_harmonics)
+
+        spectrum = np.zeros(table_size // 2 + 1, dtype=complex)
+        spectrum[1:n_harmonics + 1] = (cos_amps - 1j * sin_amps) * table_size / 2.0
+        cycle = np.fft.irfft(spectrum, table_size)
+
+        tables[octave, 1:-2] = cycle
+        tables[octave, 0] = cycle[-1]
+        tables[octave, -2:] = cycle[:2]
+
+    tables.flags.writeable = False
+    return tables
+
+
+class WavetableOscillator:
+    """
+    Mipmapped wavetable oscillator that renders whole blocks at once.
+    The phase is carried between calls to process, so blocks join up seamlessly
+    whatever their size.
+    """
+    def __init__(self, fs, freq, waveform='saw', interpolation='linear', table_size=WAVETABLE_SIZE):
+        if interpolation not in ('linear', 'cubic'):
+            raise ValueError(f"unknown interpolation '{interpolation}', expected linear or cubic")
+        self.fs = fs
+        self.freq = freq
+        self.waveform = waveform
+        self.interpolation = interpolation
+        self.table_size = table_size
+        self.tables = mipmap_tables(waveform, fs, table_size)
+        self.phase = 0.0
+
+    def __str__(self):
+        return f"waveform = {self.waveform}, freq = {self.freq}, phase = {self.phase}"
+
+    def reset(self, phase=0.0):
+        """ restart at phase (in cycles, 0..1) """
+        self.phase = phase * self.table_size
+
+    def set_frequency(self, freq):
+        self.freq = freq
+
+    def process(self, n_samples, freq=None, out=None):
+        """ Render the next block
+        :param n_samples: block length
+        :param freq: frequency for this block; a scalar, or exactly n_samples values for
+                     glides / FM, after which the last value is the current frequency
+                     (defaults to the current frequency)
+        :param out: optional array to render into
+        :return: the block as a 1-D array
+        """
+        freq = np.asarray(self.freq if freq is None else freq, dtype=float)
+        if freq.ndim > 0 and freq.shape != (n_samples,):
+            raise ValueError(f"freq has {freq.shape} values for a block of {n_samples} samples; "
+                             f"give a scalar or one value per sample")
+        if freq.size:
+            self.freq = float(freq.reshape(-1)[-1])
+        increment = freq * self.table_size / self.fs
+
+        if increment.ndim == 0:
+            position = self.phase + increment * np.arange(n_samples)
+            self.phase = (self.phase + increment * n_samples) % self.table_size
+        else:
+            steps = np.cumsum(increment)
+            position = self.phase + np.concatenate(([0.0], steps[:-1]))
+            self.phase = (self.phase + steps[-1]) % self.table_size
+        position %= self.table_size
+        position[position >= self.table_size] = 0.0  # -tiny % size can round up to size
+
+        # the highest frequency in the block picks the table, so nothing aliases
+        table = self.tables[self._octave(np.max(np.abs(freq), initial=0.0))]
+        position += 1.0  # skip the leading guard sample
+        index = position.astype(int)
+
+        if self.interpolation == 'cubic':
+            return into(out, third_order_hermite_interpolator(index, position, table))
+        return into(out, first_order_linear_interpolator(index, position, table))
 
+    def _octave(self, freq):
+        octave = int(np.ceil(np.log2(max(freq, LOWEST_FREQUENCY) / LOWEST_FREQUENCY))) - 1
+        return min(max(octave, 0), len(self.tables) - 1)
@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+import algo_dsp_filters as adf
+from algo_audio_graph import AudioGraph
+from algo_dsp_amplitude import LookaheadLimiter
+from algo_dsp_wavetables import WavetableOscillator
+
+fs = 48000
+x = np.random.default_rng(17).uniform(-1.0, 1.0, (2, 64 * 50))
+eq_bands = [(10, 120.0, 0.707, 3.0), (9, 1000.0, 2.0, -6.0), (11, 8000.0, 0.707, -2.0)]
+
+
+def _resonator():
+    _, _, b2, b1, a0 = adf.simple_resonator_coefficients(fs, 1000.0, 5.0)
+    return adf.Biquad([a0, 0.0, 0.0, b1, b2])
+
+
+def _live_chain():
+    return [adf.DcBlocker(streaming=True), adf.ParametricEQ(fs, eq_bands), _resonator(),
+            LookaheadLimiter(fs, lookahead_ms=1.0)]
+
+
+def test_live_chain_matches_calling_the_processors():
+    graph = AudioGraph(block_size=64, channels=2)
+    previous = graph.add_input()
+    for index, processor in enumerate(_live_chain()):
+        previous = graph.add(f"stage{index}", processor, previous)
+
+    chain = _live_chain()
+    for start in range(0, x.shape[-1], 64):
+        block = x[:, start:start + 64]
+        res = graph.process(block)
+        for processor in chain:
+            block = processor.process(block)
+        assert np.array_equal(res, block)
+
+
+def test_buffers_are_allocated_once():
+    graph = AudioGraph(block_size=64, channels=2)
+    graph.add_input()
+    graph.add('dc', adf.DcBlocker(streaming=True), 'input')
+    first = graph.process(x[:, :64])
+    buffers = {name: graph.buffer(name) for name in graph.order}
+    for start in range(64, 640, 64):
+        assert graph.process(x[:, start:start + 64]) is first
+    assert all(graph.buffer(name) is buffer for name, buffer in buffers.items())
+
+
+def test_fan_out_sum_and_sources():
+    """ One oscillator feeds two filters whose outputs are mixed """
+    graph = AudioGraph(block_size=64)
+    graph.add_source('osc', WavetableOscillator(fs, 440.0))
+    graph.add('low', adf.Biquad(adf.bi_quad_coeffs(5, 1000.0, fs, 0.707, 0.0)), 'osc')
+    graph.add('high', adf.Biquad(adf.bi_quad_coeffs(6, 1000.0, fs, 0.707, 0.0)), 'osc')
+    graph.add('mix', None, ['low', 'high'])
+    assert graph.compile().order.index('osc') == 0 and graph.output == 'mix'
+
+    osc = WavetableOscillator(fs, 440.0)
+    low = adf.Biquad(adf.bi_quad_coeffs(5, 1000.0, fs, 0.707, 0.0))
+    high = adf.Biquad(adf.bi_quad_coeffs(6, 1000.0, fs, 0.707, 0.0))
+    for _ in range(10):
+        tone = osc.process(64)
+        assert np.allclose(graph.process(), low.process(tone) + high.process(tone), atol=1e-15)
+
+
+def test_bad_graphs_are_rejected():
+    graph = AudioGraph()
+    graph.add('a', None, 'b')
+    graph.add('b', None, 'a')
+    with pytest.raises(ValueError):
+        graph.compile()
+    dangling = AudioGraph()
+    dangling.add('a', None, 'nowhere')
+    with pytest.raises(KeyError):
+        dangling.compile()
+    with pytest.raises(ValueError):
+        AudioGraph().add('dc', adf.DcBlocker(), 'input')
@@ -0,0 +1,94 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+import algo_audio_pipeline as aap
+from util_batch_render import build_chain, parse_chain, render_file
+from util_wave_files import WavWriter, read_wav
+
+fs = 48000
+noise = np.random.default_rng(19).uniform(-0.5, 0.5, (2, 20000))
+
+
+def test_concurrent_renders_match_the_synchronous_render(tmp_path):
+    stages = parse_chain("dc,biquad:6:30:0.707,resonator:1000:5")
+    with WavWriter(tmp_path / 'in.wav', fs, 2, 'float32') as writer:
+        writer.write(noise)
+    render_file(tmp_path / 'in.wav', tmp_path / 'sync.wav', stages, 1000)
+
+    async def main():
+        return await asyncio.gather(*[
+            aap.render_wav(tmp_path / 'in.wav', tmp_path / f"async{i}.wav", build_chain(stages, fs), 1000)
+            for i in range(8)])
+
+    assert asyncio.run(main()) == [noise.shape[-1]] * 8
+    exp, _ = read_wav(tmp_path / 'sync.wav')
+    for i in range(8):
+        assert np.array_equal(read_wav(tmp_path / f"async{i}.wav")[0], exp)
+
+
+def test_bounded_queues_hold_back_the_source():
+    """ With a stalled consumer the source runs at most a few queues' worth ahead """
+    produced = []
+
+    def blocks():
+        for i in range(100):
+            produced.append(i)
+            yield np.zeros(64)
+
+    async def main():
+        stream = aap.pipeline(aap.iterate(blocks()), aap.process_stage(lambda b: b + 1.0), maxsize=2)
+        first = await stream.__anext__()
+        await asyncio.sleep(0.1)
+        ahead = len(produced)
+        rest = [b async for b in stream]
+        return first, ahead, rest
+
+    first, ahead, rest = asyncio.run(main())
+    assert first[0] == 1.0 and len(rest) == 99
+    assert ahead <= 10
+
+
+def test_consumer_can_stop_early():
+    """ breaking out and closing the stream closes every stage and leaves no task behind """
+    closed = []
+
+    async def source():
+        try:
+            while True:
+                yield np.zeros(64)
+        finally:
+            closed.append('source')
+
+    async def stage(blocks):
+        try:
+            async for block in blocks:
+                yield block
+        finally:
+            closed.append('stage')
+
+    async def main():
+        before = asyncio.all_tasks()
+        stream = aap.pipeline(source(), stage, aap.process_stage(lambda x: x + 1.0), maxsize=1)
+        received = 0
+        async for _ in stream:
+            received += 1
+            if received == 3:
+                break
+        await stream.aclose()
+        return asyncio.all_tasks() - before
+
+    assert asyncio.run(asyncio.wait_for(main(), 5)) == set()
+    assert sorted(closed) == ['source', 'stage']
+
+
+def test_stage_errors_reach_the_consumer():
+    def fail(block):
+        raise RuntimeError("bad block")
+
+    async def main():
+        return [b async for b in aap.pipeline(aap.iterate([np.zeros(4)] * 3), aap.process_stage(fail))]
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(main())
@@ -1,3 +1,7 @@
+import numpy as np
+import pytest
+
+import algo_dsp_amplitude as ada
 from algo_dsp_amplitude import inc
 
 
@@ -9,3 +13,63 @@ def test_one_more_than_five():
 def test_one_more_than_3():
     """ Silly example test 3+1=4 """
     assert inc(3) == 4
+
+
+#####################################################
+#
+# Dynamics
+#
+#####################################################
+
+fs = 48000
+rng = np.random.default_rng(13)
+burst = rng.standard_normal((2, 24000)) * np.repeat([0.05, 1.0, 0.2, 3.0], 6000)
+
+
+def _blocks(processor, x, sizes):
+    out, start = [], 0
+    for size in sizes:
+        out.append(processor.process(x[..., start:start + size]))
+        start += size
+    out.append(processor.process(x[..., start:]))
+    return np.concatenate(out, axis=-1)
+
+
+def test_sliding_max_matches_window_rescan():
+    x = rng.standard_normal((2, 1000))
+    for window in (1, 2, 7, 64):
+        exp = np.stack([x[:, i:i + window].max(axis=-1) for i in range(1000 - window + 1)], axis=-1)
+        assert np.array_equal(ada.sliding_max(x, window), exp)
+
+
+def test_envelope_follower_matches_per_sample_loop():
+    follower = ada.EnvelopeFollower(fs, attack_ms=2.0, release_ms=30.0)
+    res = _blocks(follower, burst, rng.integers(0, 3000, 10))
+
+    held, env = np.zeros(2), np.zeros(2)
+    exp = np.empty(burst.shape)
+    for n in range(burst.shape[-1]):
+        held = np.maximum(np.abs(burst[:, n]), follower.release * held)
+        env = follower.attack * env + (1 - follower.attack) * held
+        exp[:, n] = env
+    assert np.allclose(res, exp, rtol=1e-9, atol=1e-12)
+
+
+def test_compressor_steady_state_follows_the_static_curve():
+    """ A -10 dB tone into a 4:1 compressor at -20 dB settles at -17.5 dB """
+    compressor = ada.Compressor(fs, threshold_db=-20.0, ratio=4.0, attack_ms=1.0, release_ms=20.0)
+    tone = ada.db_to_gain(-10.0) * np.sign(np.sin(2 * np.pi * 100.0 * np.arange(fs) / fs) + 1e-9)
+    res = _blocks(compressor, tone, [512] * 50)
+    assert ada.gain_to_db(np.max(np.abs(res[-4800:]))) == pytest.approx(-17.5, abs=1e-6)
+    knee = ada.Compressor(fs, -20.0, 4.0, knee_db=6.0).gain_reduction([-23.0, -20.0, -17.0, -10.0])
+    assert knee == pytest.approx([0.0, 0.5625, 2.25, 7.5])
+
+
+def test_lookahead_limiter_is_a_brickwall():
+    limiter = ada.LookaheadLimiter(fs, ceiling_db=-1.0, lookahead_ms=2.0, release_ms=50.0)
+    res = _blocks(limiter, burst, rng.integers(0, 2000, 20))
+    assert np.max(np.abs(res)) <= ada.db_to_gain(-1.0) * (1 + 1e-12)
+
+    quiet = 0.1 * burst[:, :6000]
+    passed = ada.LookaheadLimiter(fs, lookahead_ms=2.0).process(quiet)
+    assert np.allclose(passed[:, 96:], quiet[:, :-96])
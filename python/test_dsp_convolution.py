@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+from scipy.signal import fftconvolve
+
+import algo_dsp_convolution as adc
+from algo_dsp_filters import one_zero_filter
+
+rng = np.random.default_rng(7)
+x = rng.standard_normal((2, 30000))
+
+
+def _ir(n_taps):
+    return rng.standard_normal(n_taps) * np.exp(-5.0 * np.arange(n_taps) / n_taps)
+
+
+def _stream(fir, signal, sizes):
+    blocks, start = [], 0
+    for size in sizes:
+        blocks.append(fir.process(signal[..., start:start + size]))
+        start += size
+    blocks.append(fir.process(signal[..., start:]))
+    return np.concatenate(blocks, axis=-1)
+
+
+@pytest.mark.parametrize('method', adc.METHODS)
+@pytest.mark.parametrize('n_taps', [1, 40, 700, 9000])
+def test_every_method_streams_the_exact_convolution(method, n_taps):
+    """ Blocks of any size, including empty ones, give the full-length convolution with no latency """
+    h = _ir(n_taps)
+    sizes = rng.integers(0, 400, 120)
+    res = _stream(adc.FirFilter(h, block_size=128, method=method), x, sizes)
+    exp = fftconvolve(x, h[np.newaxis, :], axes=-1)[:, :x.shape[-1]]
+    assert res.shape == x.shape
+    assert np.max(np.abs(res - exp)) < 1e-10
+
+
+def test_auto_picks_by_length_and_block_size():
+    assert adc.choose_method(32, 256) == 'direct'
+    assert adc.choose_method(200, 256) == 'overlap-save'
+    assert adc.choose_method(4000, 256) == 'uniform'
+    assert adc.choose_method(500000, 256) == 'non-uniform'
+
+
+def test_non_uniform_partitions_are_computed_in_time():
+    """ Every tail partition starts at least its own length into the filter, and they tile h """
+    segments = adc._partition(500000, 256, 'non-uniform')
+    assert all(offset >= size for offset, size, _ in segments)
+    assert segments[0][0] == 256
+    assert all(o + s * p == next_o for (o, s, p), (next_o, _, _) in zip(segments, segments[1:]))
+    assert segments[-1][0] + segments[-1][1] * segments[-1][2] >= 500000
+
+
+def test_two_taps_match_one_zero_filter_and_keep_float32():
+    assert np.allclose(adc.fir_filter(x[0], [0.5, 0.5]), one_zero_filter(x[0], 0.5, 0.5), atol=1e-15)
+    assert adc.fir_filter(x.astype(np.float32), _ir(300)).dtype == np.float32
@@ -1,4 +1,8 @@
 
+import numpy as np
+
+import algo_dsp_filters as adf
+import util_functions as uf
 import util_signals as us
 from algo_dsp_filters import DcBlocker
 from hope_dsp_filters import dc_blocker_exp
@@ -19,3 +23,245 @@ def test_dc_blocker():
     dcb_test.reset()
     res = dcb_test.process(imp)
     assert res == exp
+
+
+#####################################################
+# Engine vs. the original per-sample loops
+#####################################################
+noise = np.random.default_rng(1).uniform(-1.0, 1.0, 4800)
+
+
+def _loop_second_order(x, b0, b1, b2, a1, a2):
+    """ the per-sample loop the filters used before the engine """
+    y = np.zeros(x.shape)
+    xz1 = xz2 = yz1 = yz2 = 0
+    for i in range(len(x)):
+        y[i] = b0 * x[i] + b1 * xz1 + b2 * xz2 - a1 * yz1 - a2 * yz2
+        yz2 = yz1
+        yz1 = y[i]
+        xz2 = xz1
+        xz1 = x[i]
+    return y
+
+
+def test_simple_resonator_matches_loop():
+    """ Resonator agrees with the per-sample loop """
+    _, _, b2, b1, a0 = adf.simple_resonator_coefficients(48000, 1000, 20)
+    exp = _loop_second_order(noise, a0, 0, 0, b1, b2)
+    res = adf.simple_resonator(noise, 48000, 1000, 20)
+    assert np.max(np.abs(res - exp)) <= 1e-12 * np.max(np.abs(exp))
+
+
+def test_second_order_lowpass_matches_loop():
+    """ kLPF2 agrees with the per-sample loop """
+    a0, a1, a2, b1, b2, _, _ = adf.second_order_lowpass_coefficients(48000, 500, 0.707)
+    exp = _loop_second_order(noise, a0, a1, a2, b1, b2)
+    res = adf.second_order_lowpass(noise, 48000, 500, 0.707)
+    assert np.max(np.abs(res - exp)) <= 1e-12 * np.max(np.abs(exp))
+
+
+def test_bi_quad_matches_loop():
+    """ bi_quad keeps its (1 + a0) feed-forward gain """
+    params = [0.0675, 0.135, 0.0675, -1.143, 0.4128]
+    exp = _loop_second_order(noise, 1 + params[0], params[1], params[2], params[3], params[4])
+    res = adf.bi_quad(noise, params)
+    assert np.max(np.abs(res - exp)) <= 1e-12 * np.max(np.abs(exp))
+
+
+def test_iir_filter_carries_state():
+    """ Two calls with the carried state equal one call over the whole signal """
+    b, a = [0.2, 0.4, 0.2], [1.0, -0.5, 0.3]
+    whole, _ = adf.iir_filter(noise, b, a)
+    first, zf = adf.iir_filter(noise[:1000], b, a)
+    second, _ = adf.iir_filter(noise[1000:], b, a, zi=zf)
+    assert np.array_equal(np.concatenate((first, second)), whole)
+
+
+#####################################################
+# Streaming biquad
+#####################################################
+lpf_params = [0.0675, 0.135, 0.0675, -1.143, 0.4128]
+
+
+def test_biquad_block_size_independent():
+    """ Whole-signal and block-by-block output are bit-identical """
+    bq = adf.Biquad(lpf_params)
+    whole = bq.process(noise)
+    for block_size in (1, 64, 333, 1024):
+        bq.reset()
+        blocks = [bq.process(noise[i:i + block_size]) for i in range(0, len(noise), block_size)]
+        assert np.array_equal(np.concatenate(blocks), whole)
+
+
+def test_util_bi_quad_matches_biquad():
+    """ util_functions.bi_quad runs the same filter from zero state """
+    assert np.array_equal(uf.bi_quad(noise, lpf_params), adf.Biquad(lpf_params).process(noise))
+
+
+#####################################################
+# Multichannel (n_channels, n_samples) input
+#####################################################
+stereo = np.vstack((noise, noise[::-1]))
+
+
+def test_shared_coefficients_per_channel_state():
+    """ Each channel of a 2-D input filters as if it were alone """
+    res = adf.second_order_lowpass(stereo, 48000, 500, 0.707)
+    for ch in range(2):
+        assert np.array_equal(res[ch], adf.second_order_lowpass(stereo[ch], 48000, 500, 0.707))
+
+
+def test_per_channel_coefficients():
+    """ Array-valued parameters give each channel its own filter """
+    res = adf.simple_resonator(stereo, 48000, np.array([500.0, 2000.0]), 10)
+    for ch, fc in enumerate((500.0, 2000.0)):
+        assert np.allclose(res[ch], adf.simple_resonator(stereo[ch], 48000, fc, 10), rtol=0, atol=1e-12)
+
+
+def test_multichannel_biquad_streams():
+    """ A per-channel Biquad streams 2-D blocks like two mono ones """
+    params = np.array([lpf_params, [0.9, -1.8, 0.9, -1.79, 0.81]])
+    bq = adf.Biquad(params)
+    res = np.concatenate([bq.process(stereo[:, i:i + 256]) for i in range(0, stereo.shape[1], 256)], axis=-1)
+    for ch in range(2):
+        assert np.array_equal(res[ch], adf.Biquad(params[ch]).process(stereo[ch]))
+
+
+def test_multichannel_dc_blocker():
+    """ DcBlocker keeps x1/y1 per channel """
+    dcb = DcBlocker()
+    dcb.process(stereo[:, :1000])
+    res = dcb.process(stereo[:, 1000:])
+    for ch in range(2):
+        mono = DcBlocker()
+        assert np.allclose(res[ch], mono.process(stereo[ch]), rtol=0, atol=1e-12)
+
+
+#####################################################
+# Biquad cascade / parametric EQ
+#####################################################
+eq_bands = [(10, 120.0, 0.707, 3.0), (9, 1000.0, 2.0, -6.0), (9, 4000.0, 1.0, 4.0), (6, 30.0, 0.707, 0.0)]
+
+
+def test_cascade_matches_chained_biquads():
+    """ One fused pass equals running the sections one after another """
+    eq = adf.ParametricEQ(48000, eq_bands)
+    exp = noise
+    for kind, fc, q, gain in eq_bands:
+        exp = adf.Biquad(uf.bi_quad_coeffs(kind, fc, 48000, q, gain)).process(exp)
+    assert np.allclose(eq.process(noise), exp, rtol=0, atol=1e-12)
+
+
+def test_cascade_streams_in_blocks():
+    """ Block-by-block output equals whole-signal output """
+    eq = adf.ParametricEQ(48000, eq_bands)
+    whole = eq.process(stereo)
+    eq.reset()
+    blocks = [eq.process(stereo[:, i:i + 128]) for i in range(0, stereo.shape[1], 128)]
+    assert np.array_equal(np.concatenate(blocks, axis=-1), whole)
+
+
+def test_set_band_changes_one_section():
+    """ set_band redesigns only the band it is given """
+    eq = adf.ParametricEQ(48000, eq_bands)
+    before = eq.sos.copy()
+    eq.set_band(1, 9, 1500.0, 2.0, -3.0)
+    assert np.array_equal(np.delete(eq.sos, 1, axis=0), np.delete(before, 1, axis=0))
+    assert not np.array_equal(eq.sos[1], before[1])
+
+
+#####################################################
+# Coefficient design
+#####################################################
+def test_bi_quad_coeffs_is_silent_and_cached(capsys):
+    """ No output, and a repeated design is served from the cache """
+    first = uf.bi_quad_coeffs(9, 1234.5, 48000, 1.5, -4.0)
+    hits = adf._bi_quad_coeffs_cached.cache_info().hits
+    assert uf.bi_quad_coeffs(9, 1234.5, 48000, 1.5, -4.0) == first
+    assert adf._bi_quad_coeffs_cached.cache_info().hits == hits + 1
+    assert capsys.readouterr().out == ""
+
+
+def test_bi_quad_coeffs_array_rows_match_scalar_designs():
+    """ Array arguments give one row per point, matching the scalar designs """
+    fc = np.geomspace(20.0, 20000.0, 50)
+    gain = np.linspace(-12.0, 12.0, 50)
+    for kind in adf.BI_QUAD_KINDS:
+        res = uf.bi_quad_coeffs(kind, fc, 48000, 0.707, gain)
+        assert res.shape == (50, 5)
+        exp = [uf.bi_quad_coeffs(kind, f, 48000, 0.707, g) for f, g in zip(fc, gain)]
+        assert np.allclose(res, exp, rtol=1e-12, atol=1e-12)
+
+
+#####################################################
+# Modulated filters
+#####################################################
+def test_modulated_filter_matches_block_wise_biquad():
+    """ Same result as a streaming Biquad retuned every control block """
+    fc = np.geomspace(200.0, 8000.0, len(noise))
+    res = adf.modulated_bi_quad(noise, 5, 48000, fc, 2.0, control_block=64)
+    centers = adf._control_trajectory(fc, len(noise), 64)
+    bq = adf.Biquad(uf.bi_quad_coeffs(5, centers[0], 48000, 2.0, 0.0))
+    exp = []
+    for i, f in enumerate(centers):
+        bq.set_params(uf.bi_quad_coeffs(5, f, 48000, 2.0, 0.0))
+        exp.append(bq.process(noise[i * 64:(i + 1) * 64]))
+    assert np.allclose(res, np.concatenate(exp), rtol=0, atol=1e-12)
+
+
+def test_modulated_lowpass_with_constant_parameters_is_static():
+    """ Constant trajectories give the static filter """
+    res = adf.modulated_second_order_lowpass(stereo, 48000, [500.0, 500.0], 0.707, control_block=16)
+    assert np.allclose(res, adf.second_order_lowpass(stereo, 48000, 500.0, 0.707), rtol=0, atol=1e-12)
+
+
+#####################################################
+# Streaming DC blocker
+#####################################################
+def test_streaming_dc_blocker_returns_blocks():
+    """ Streaming blocks join up to the accumulated output, with no history kept """
+    exp = DcBlocker().process(noise)
+    dcb = DcBlocker(streaming=True)
+    res = [dcb.process(noise[i:i + 480]).copy() for i in range(0, len(noise), 480)]
+    assert np.array_equal(np.concatenate(res), exp)
+    assert dcb.output_signal == []
+
+
+def test_streaming_dc_blocker_out_and_in_place():
+    """ Results land in the caller's buffer, or in the input itself """
+    out = np.empty(480)
+    dcb = DcBlocker(streaming=True)
+    assert dcb.process(noise[:480], out=out) is out
+    block = noise[480:960].copy()
+    assert dcb.process(block, in_place=True) is block
+    assert np.array_equal(np.concatenate((out, block)), DcBlocker().process(noise[:960]))
+
+
+def test_float32_in_float32_out_within_half_an_ulp():
+    """ float32 signals stay float32; the float64 recursion only adds the final rounding """
+    x32 = stereo.astype(np.float32)
+    exact = adf.ParametricEQ(48000, eq_bands).process(x32.astype(float))
+    eq = adf.ParametricEQ(48000, eq_bands)
+    y = np.concatenate([eq.process(x32[:, i:i + 1000]) for i in range(0, x32.shape[-1], 1000)], axis=-1)
+    assert y.dtype == np.float32
+    assert np.all(np.abs(y - exact) <= np.abs(exact) * 2.0 ** -24)
+    assert eq.z.dtype == np.float64
+
+
+def test_float32_chunks_are_seamless(monkeypatch):
+    """ Chunking float32 input through the float64 engine doesn't change the result """
+    monkeypatch.setattr(adf, 'FLOAT32_CHUNK', 100)
+    x32 = noise.astype(np.float32)
+    coeffs = adf.bi_quad_coeffs(5, np.geomspace(100.0, 10000.0, 150), 48000, 0.707, 0.0)
+    exp, _ = adf.modulated_filter(x32.astype(float), coeffs)
+    y, _ = adf.modulated_filter(x32, coeffs)
+    assert y.dtype == np.float32 and np.array_equal(y, exp.astype(np.float32))
+    exp = adf.one_pole_filter(x32.astype(float), 0.5, 0.5).astype(np.float32)
+    assert np.array_equal(adf.one_pole_filter(x32, 0.5, 0.5), exp)
+
+
+def test_streaming_dc_blocker_keeps_float32():
+    dc_blocker = DcBlocker(streaming=True)
+    block = dc_blocker.process(stereo[:, :512].astype(np.float32))
+    assert block.dtype == np.float32
+    assert DcBlocker().process([1.0, 0.5])[0] == 1.0
@@ -1,15 +1,28 @@
-"""
-
-"""
-
-# from algo_dsp_functions import first_order_linear_interpolator
-# from inpt_wp_inputs import impls
-#
-# class TestLinearInterpolator:
-#
-#     def test_first_order_linear_interpolator_one(self):
-#         arr = impls()
-#         i = 1
-#         k = 4
-#         res = first_order_linear_interpolator(i, k, arr)
-#         assert res == res + 4
+import numpy as np
+
+from algo_dsp_functions import first_order_linear_interpolator, third_order_hermite_interpolator
+
+
+class TestLinearInterpolator:
+
+    def test_first_order_linear_interpolator_one(self):
+        arr = np.array([0.0, 1.0, 3.0, 7.0])
+        assert first_order_linear_interpolator(1, 1.25, arr) == 1.5
+
+    def test_first_order_linear_interpolator_array(self):
+        arr = np.array([0.0, 1.0, 3.0, 7.0])
+        k = np.array([0.5, 1.0, 2.75])
+        res = first_order_linear_interpolator(k.astype(int), k, arr)
+        assert np.array_equal(res, [0.5, 1.0, 6.0])
+
+
+class TestHermiteInterpolator:
+
+    def test_hits_the_samples(self):
+        arr = np.array([0.0, 1.0, 3.0, 7.0, 2.0, 5.0])
+        i = np.array([1, 2, 3])
+        assert np.array_equal(third_order_hermite_interpolator(i, i.astype(float), arr), arr[1:4])
+
+    def test_reproduces_a_quadratic(self):
+        arr = np.arange(6.0) ** 2
+        assert np.isclose(third_order_hermite_interpolator(2, 2.5, arr), 6.25)
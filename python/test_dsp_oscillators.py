@@ -0,0 +1,53 @@
+import tracemalloc
+
+import numpy as np
+
+from algo_dsp_oscillators import SUB_BLOCK, OscillatorBank
+
+fs = 48000
+freqs = np.linspace(100.0, 12000.0, 300)
+amps = 1.0 / np.arange(1, 301)
+phases = np.linspace(0.0, np.pi, 300)
+
+
+def _sum_of_sines(t, f, a, ph):
+    return np.sum(a[:, np.newaxis] * np.sin(2 * np.pi * f[:, np.newaxis] * t + ph[:, np.newaxis]), axis=0)
+
+
+def test_bank_matches_sum_of_sines():
+    """ Blocks of any size join up to the directly computed sum """
+    bank = OscillatorBank(fs, freqs, amps, phases)
+    res = np.concatenate([bank.process(n) for n in (512, 512, 100, 1000)])
+    exp = _sum_of_sines(np.arange(len(res)) / fs, freqs, amps, phases)
+    assert np.max(np.abs(res - exp)) < 1e-9
+
+
+def test_amplitude_ramp():
+    """ Amplitude targets are reached linearly across the block """
+    bank = OscillatorBank(fs, [1000.0], [0.0])
+    res = bank.process(480, amps=[1.0])
+    t = np.arange(480) / fs
+    assert np.allclose(res, (np.arange(480) / 480) * np.sin(2 * np.pi * 1000.0 * t), rtol=0, atol=1e-12)
+
+
+def test_frequency_glide_keeps_phase():
+    """ A glide accumulates phase sample by sample and hands it on to the next block """
+    bank = OscillatorBank(fs, [1000.0], [1.0])
+    glide = bank.process(480, freqs=[2000.0])
+    steady = bank.process(480)
+    inst_freq = 1000.0 + 1000.0 * np.arange(480) / 480
+    phase = 2 * np.pi * np.concatenate(([0.0], np.cumsum(inst_freq)[:-1])) / fs
+    end_phase = phase[-1] + 2 * np.pi * inst_freq[-1] / fs
+    exp_steady = np.sin(end_phase + 2 * np.pi * 2000.0 * np.arange(480) / fs)
+    assert np.allclose(glide, np.sin(phase), rtol=0, atol=1e-9)
+    assert np.allclose(steady, exp_steady, rtol=0, atol=1e-9)
+
+
+def test_working_memory_does_not_grow_with_block_size():
+    """ 2000 partials x 4096 samples would be 131 MB of complex table in one go """
+    bank = OscillatorBank(fs, np.linspace(50.0, 20000.0, 2000), 1e-3)
+    tracemalloc.start()
+    bank.process(4096, freqs=np.linspace(60.0, 19000.0, 2000))
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    assert peak < 10 * 2000 * 16 * SUB_BLOCK
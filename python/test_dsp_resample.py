@@ -0,0 +1,68 @@
+import tracemalloc
+
+import numpy as np
+import pytest
+
+import algo_dsp_resample as adr
+
+rng = np.random.default_rng(11)
+fs = 44100
+t = np.arange(fs // 2) / fs
+tones = np.vstack((np.sin(2 * np.pi * 1000.0 * t), 0.5 * np.sin(2 * np.pi * 7000.0 * t)))
+
+
+@pytest.mark.parametrize('fs_out', [48000, 96000, 32000, 22050])
+def test_resampled_tones_land_on_the_new_grid(fs_out):
+    """ A tone resampled to fs_out is the same tone sampled at fs_out (edges aside) """
+    y = adr.resample(tones, fs, fs_out)
+    assert y.shape == (2, -(-tones.shape[-1] * fs_out // fs))
+    t_out = np.arange(y.shape[-1]) / fs_out
+    exp = np.vstack((np.sin(2 * np.pi * 1000.0 * t_out), 0.5 * np.sin(2 * np.pi * 7000.0 * t_out)))
+    assert np.max(np.abs(y - exp)[:, 100:-100]) < 1e-4
+
+
+def test_streaming_is_block_size_independent():
+    resampler = adr.Resampler(fs, 48000)
+    blocks, start = [], 0
+    for size in rng.integers(0, 3000, 60):
+        blocks.append(resampler.process(tones[:, start:start + size]))
+        start += size
+    blocks += [resampler.process(tones[:, start:]), resampler.flush()]
+    assert np.array_equal(np.concatenate(blocks, axis=-1), adr.resample(tones, fs, 48000))
+
+
+def test_tables_are_cached_and_ratio_reduced():
+    assert adr.rate_ratio(44100, 48000) == (160, 147)
+    assert adr.rate_ratio(96000, 48000) == (1, 2)
+    table = adr.polyphase_table(160, 147)
+    assert adr.Resampler(44100.0, 48000).table is table and not table.flags.writeable
+    assert np.allclose(table.sum(axis=1), 1.0, atol=1e-3)
+    with pytest.raises(ValueError):
+        adr.rate_ratio(44100, 48001)
+
+
+def test_downsampling_rejects_what_would_alias():
+    """ 20 kHz can't exist at 32 kHz; it must not fold back to 12 kHz """
+    x = np.sin(2 * np.pi * 20000.0 * np.arange(fs) / fs)
+    y = adr.resample(x.astype(np.float32), fs, 32000)
+    assert y.dtype == np.float32
+    assert np.max(np.abs(y[1000:-1000])) < 1e-3
+
+
+def test_memory_does_not_grow_with_length():
+    """ the gathered windows are built OUTPUT_CHUNK outputs at a time """
+    x = rng.standard_normal((2, 5 * 48000))
+    tracemalloc.start()
+    y = adr.Resampler(48000, 44100).process(x)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    assert peak < 2 * x.nbytes + 4 * adr.OUTPUT_CHUNK * 2 * adr.polyphase_table(147, 160).shape[1] * 8
+    assert y.shape[0] == 2 and y.shape[-1] > 4 * 44100
+
+
+def test_flush_with_nothing_fed_is_empty():
+    resampler = adr.Resampler(fs, 48000)
+    assert resampler.flush().shape == (0,)
+    resampler.process(tones[:, :0].astype(np.float32))
+    y = resampler.flush()
+    assert y.shape == (2, 0) and y.dtype == np.float32
@@ -0,0 +1,44 @@
+import numpy as np
+from scipy import signal
+
+import algo_dsp_response as adr
+from algo_dsp_filters import bi_quad_coeffs
+
+fs = 48000
+b, a = [0.2, 0.4, 0.2], [1.0, -0.5, 0.3]
+
+
+def test_matches_scipy_freqz_and_group_delay():
+    w, h = signal.freqz(b, a)
+    freqs, magnitude, phase, group_delay = adr.response(b, a)
+    assert np.array_equal(freqs, w)
+    assert np.allclose(magnitude, 20 * np.log10(np.abs(h)), atol=1e-12)
+    assert np.allclose(phase, np.unwrap(np.angle(h)), atol=1e-12)
+    assert np.allclose(group_delay, signal.group_delay((b, a))[1], atol=1e-9)
+
+
+def test_log_grid_in_hz():
+    freqs = adr.log_frequencies(fs, 200)
+    assert freqs[0] == 20.0 and freqs[-1] < fs / 2
+    _, h = adr.frequency_response(b, a, freqs, fs)
+    assert np.allclose(h, signal.freqz(b, a, worN=freqs, fs=fs)[1], atol=1e-12)
+
+
+def test_batch_rows_match_single_designs():
+    """ Many bi_quad_coeffs designs are evaluated at once, row for row """
+    params = bi_quad_coeffs(9, np.geomspace(100.0, 10000.0, 50), fs, 2.0, 6.0)
+    freqs = adr.log_frequencies(fs, 64)
+    _, magnitude, phase, group_delay = adr.bi_quad_response(params, freqs, fs)
+    assert magnitude.shape == (50, 64)
+    for row in (0, 17, 49):
+        single = adr.bi_quad_response(params[row], freqs, fs)
+        assert np.allclose(single[1], magnitude[row], atol=1e-9)
+        assert np.allclose(single[2], phase[row], atol=1e-9)
+        assert np.allclose(single[3], group_delay[row], atol=1e-6)
+
+
+def test_single_designs_are_cached_and_silent(capsys):
+    first = adr.response(b, a, 256)
+    assert adr.response(list(b), tuple(a), 256) is first
+    assert not first[1].flags.writeable
+    assert capsys.readouterr().out == ""
@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+from scipy import signal
+
+from algo_dsp_spectrum import SpectrumAnalyzer, magnitude_spectrum, window
+
+fs = 48000
+noise = np.random.default_rng(5).standard_normal((2, 50000))
+
+
+def test_running_psd_matches_welch():
+    """ Block-fed frames average to scipy's Welch estimate, whatever the block size """
+    analyzer = SpectrumAnalyzer(fs, fft_size=1024, hop=256)
+    for start in range(0, noise.shape[-1], 777):
+        analyzer.process(noise[:, start:start + 777])
+    freqs, exp = signal.welch(noise, fs, nperseg=1024, noverlap=768, detrend=False)
+    assert np.array_equal(analyzer.freqs, freqs)
+    assert analyzer.n_frames == (noise.shape[-1] - 1024) // 256 + 1
+    assert np.allclose(analyzer.psd, exp, rtol=1e-10, atol=0)
+
+
+def test_frames_and_peak_hold():
+    t = np.arange(fs) / fs
+    analyzer = SpectrumAnalyzer(fs, fft_size=1024, hop=1024, window_name='rect')
+    spectra = analyzer.process(np.sin(2 * np.pi * (fs / 1024 * 10) * t[:4096]))
+    assert spectra.shape == (4, 513)
+    assert np.allclose(spectra[:, 10], 1.0)
+    analyzer.process(0.5 * np.sin(2 * np.pi * (fs / 1024 * 20) * t[:4096]))
+    assert analyzer.peak[10] == pytest.approx(1.0) and analyzer.peak[20] == pytest.approx(0.5)
+
+
+@pytest.mark.parametrize('hop', [300, 1500])
+def test_chunked_frames_equal_one_shot(hop):
+    """ hops that don't divide the block size, including hops longer than a frame """
+    x = noise[:, :10000]
+    exp = SpectrumAnalyzer(fs, fft_size=1024, hop=hop).process(x).copy()
+    analyzer = SpectrumAnalyzer(fs, fft_size=1024, hop=hop)
+    res = np.concatenate([analyzer.process(x[:, start:start + 700]).copy()
+                          for start in range(0, 10000, 700)], axis=-2)
+    assert res.shape == exp.shape == (2, (10000 - 1024) // hop + 1, 513)
+    assert np.allclose(res, exp, rtol=1e-12, atol=0)
+
+
+def test_exponential_averaging_follows_the_signal():
+    analyzer = SpectrumAnalyzer(fs, fft_size=256, averaging=0.5)
+    analyzer.process(noise[0, :25600])
+    analyzer.process(np.zeros(25600))
+    assert analyzer.psd.max() < 1e-20
+
+
+def test_magnitude_spectrum_and_windows():
+    t = np.arange(fs) / fs
+    freqs, magnitude = magnitude_spectrum(0.25 * np.sin(2 * np.pi * 1500 * t), fs)
+    assert freqs[np.argmax(magnitude)] == 1500.0 and magnitude.max() == pytest.approx(0.25)
+    assert np.allclose(window('hann', 64), signal.get_window('hann', 64))
+    with pytest.raises(ValueError):
+        window('kaiser', 64)
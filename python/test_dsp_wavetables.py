@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from algo_dsp_wavetables import WavetableOscillator, mipmap_tables
+
+
+def test_sine_table_oscillator_matches_sine():
+    """ A sine table played at 1 kHz is a 1 kHz sine """
+    osc = WavetableOscillator(48000, 1000.0, waveform='sine', interpolation='cubic')
+    exp = np.sin(2 * np.pi * 1000.0 * np.arange(4800) / 48000)
+    assert np.max(np.abs(osc.process(4800) - exp)) < 1e-6
+
+
+def test_phase_continuous_across_blocks():
+    """ Rendering in blocks equals one long render """
+    whole = WavetableOscillator(48000, 440.0).process(4800)
+    osc = WavetableOscillator(48000, 440.0)
+    blocks = np.concatenate([osc.process(n) for n in (64, 1000, 3, 3733)])
+    assert np.allclose(blocks, whole, rtol=0, atol=1e-9)
+
+
+def test_tables_are_band_limited_per_octave():
+    """ No table holds a harmonic above fs/2 for the top of its octave """
+    tables = mipmap_tables('saw', 48000)
+    for octave, row in enumerate(tables):
+        top_frequency = min(20.0 * 2 ** (octave + 1), 24000)
+        spectrum = np.abs(np.fft.rfft(row[1:-2]))
+        highest = np.flatnonzero(spectrum > 1e-9 * spectrum.max()).max()
+        assert highest * top_frequency <= 24000
+
+
+def test_per_sample_frequencies_must_cover_the_block():
+    osc = WavetableOscillator(48000, 440.0)
+    assert osc.process(64, freq=np.full(64, 880.0)).shape == (64,)
+    for freq in (np.full(32, 880.0), np.full(128, 880.0)):
+        with pytest.raises(ValueError):
+            osc.process(64, freq=freq)
+
+
+def test_glide_then_a_plain_block_carries_on_from_the_last_frequency():
+    osc = WavetableOscillator(48000, 440.0, waveform='sine', interpolation='cubic')
+    glide = np.linspace(440.0, 880.0, 64)
+    osc.process(64, freq=glide)
+    assert osc.freq == 880.0
+    res = osc.process(128)
+
+    ref = WavetableOscillator(48000, 440.0, waveform='sine', interpolation='cubic')
+    ref.process(64, freq=glide)
+    assert np.array_equal(res, ref.process(128, freq=880.0))
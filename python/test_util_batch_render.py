@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+
+import algo_dsp_filters as adf
+from util_batch_render import main, parse_chain, render_directory
+from util_wave_files import WavWriter, read_wav
+
+fs = 48000
+noise = np.random.default_rng(3).uniform(-0.5, 0.5, (2, 10000))
+
+
+def test_parse_chain():
+    assert parse_chain("dc, biquad:5:1000:0.707, lowpass:8000:0.5") == [
+        ('dc', []), ('biquad', [5.0, 1000.0, 0.707]), ('lowpass', [8000.0, 0.5])]
+
+
+def test_render_directory_matches_whole_file_filters(tmp_path, capsys):
+    """ Streamed, pooled rendering equals filtering each whole file """
+    in_dir, out_dir = tmp_path / 'in', tmp_path / 'out'
+    in_dir.mkdir()
+    for name in ('a.wav', 'b.wav'):
+        with WavWriter(in_dir / name, fs, 2, 'float32') as writer:
+            writer.write(noise)
+
+    assert main([str(in_dir), str(out_dir), '--chain', 'dc,biquad:6:30:0.707,resonator:1000:5',
+                 '--block-size', '1024', '--workers', '2']) == 0
+
+    source = noise.astype(np.float32).astype(float)
+    exp = np.asarray(adf.DcBlocker().process(source))
+    exp = adf.Biquad(adf.bi_quad_coeffs(6, 30, fs, 0.707, 0.0)).process(exp)
+    exp = adf.simple_resonator(exp, fs, 1000, 5)
+    for name in ('a.wav', 'b.wav'):
+        res, rate = read_wav(out_dir / name, dtype=np.float64)
+        assert rate == fs
+        assert np.max(np.abs(res - exp)) < 1e-6
+    assert "2 files" in capsys.readouterr().out
+
+
+def test_render_directory_resamples_to_one_rate(tmp_path):
+    in_dir, out_dir = tmp_path / 'in', tmp_path / 'out'
+    in_dir.mkdir()
+    for name, rate in (('a.wav', 44100), ('b.wav', 96000)):
+        with WavWriter(in_dir / name, rate, 2, 'float32') as writer:
+            writer.write(noise)
+
+    assert main([str(in_dir), str(out_dir), '--chain', 'dc', '--fs', '48000', '--block-size', '1000']) == 0
+    for name, rate in (('a.wav', 44100), ('b.wav', 96000)):
+        res, out_rate = read_wav(out_dir / name, dtype=np.float64)
+        assert out_rate == 48000 and res.shape == (2, -(-noise.shape[-1] * 48000 // rate))
+
+
+def test_split_render_matches_pooled_render(tmp_path):
+    in_dir = tmp_path / 'in'
+    in_dir.mkdir()
+    with WavWriter(in_dir / 'a.wav', fs, 2, 'float32') as writer:
+        writer.write(noise)
+
+    chain = 'dc:0.99,biquad:6:30:0.707,lowpass:8000:0.707'
+    assert main([str(in_dir), str(tmp_path / 'pooled'), '--chain', chain, '--workers', '1']) == 0
+    assert main([str(in_dir), str(tmp_path / 'split'), '--chain', chain, '--split']) == 0
+    exp, _ = read_wav(tmp_path / 'pooled' / 'a.wav', dtype=np.float64)
+    res, _ = read_wav(tmp_path / 'split' / 'a.wav', dtype=np.float64)
+    assert np.max(np.abs(res - exp)) < 1e-6
+
+
+@pytest.mark.parametrize('split', [False, True])
+def test_a_corrupt_file_does_not_stop_the_run(tmp_path, split):
+    in_dir, out_dir = tmp_path / 'in', tmp_path / 'out'
+    in_dir.mkdir()
+    for name in ('a.wav', 'c.wav'):
+        with WavWriter(in_dir / name, fs, 2, 'float32') as writer:
+            writer.write(noise)
+    (in_dir / 'b.wav').write_bytes(b'RIFF\x00\x00\x00\x00WAVEjunk')
+
+    lines = []
+    files, _, _, failed = render_directory(in_dir, out_dir, parse_chain('dc'), workers=2, report=lines.append,
+                                           split=split)
+    assert (files, failed) == (3, 1)
+    assert lines[1].startswith('b.wav: FAILED') and lines[2].startswith('c.wav:') and '(1 failed)' in lines[-1]
+    assert sorted(p.name for p in out_dir.iterdir()) == ['a.wav', 'c.wav']
+    assert main([str(in_dir), str(out_dir), '--chain', 'dc', '--workers', '1']) == 1
@@ -0,0 +1,28 @@
+import inspect
+
+import util_benchmarks as ub
+
+
+def test_every_public_routine_has_a_case():
+    """ New public functions/classes must be added to CASES (or SKIPPED) """
+    for name in ('algo_dsp_filters', 'util_functions', 'util_waveforms', 'util_signals'):
+        module = __import__(name)
+        covered = {routine.split('.')[0].split('(')[0] for m, routine, _, _ in ub.CASES if m == name}
+        covered.update(ub.SKIPPED.get(name, []))
+        public = {n for n, obj in vars(module).items()
+                  if not n.startswith('_') and (inspect.isfunction(obj) or inspect.isclass(obj))
+                  and obj.__module__ == name}
+        assert public <= covered, f"{name}: no benchmark for {sorted(public - covered)}"
+
+
+def test_run_benchmarks_writes_records():
+    """ A tiny run produces a record per case, length, channel count and block size """
+    records = ub.run_benchmarks(lengths=[256], channels=[1, 2], block_sizes=[64], repeat=1)
+    assert {(r['module'], r['routine']) for r in records} == {(m, r) for m, r, _, _ in ub.CASES}
+    assert all(r['samples_per_sec'] > 0 and r['peak_bytes'] >= 0 for r in records)
+
+
+def test_core_modules_import_without_matplotlib_or_scipy():
+    """ The time budget itself is left to `util_benchmarks.py --imports`; wall clock is too noisy here """
+    records = ub.run_import_benchmarks(repeat=1)
+    assert {r['module']: r['loaded'] for r in records if r['loaded']} == {}
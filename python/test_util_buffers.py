@@ -0,0 +1,139 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+import algo_dsp_amplitude as ada
+import algo_dsp_filters as adf
+import util_waveforms as uw
+from algo_audio_graph import AudioGraph
+from algo_dsp_resample import Resampler
+from algo_dsp_convolution import FirFilter
+from algo_dsp_oscillators import OscillatorBank
+from algo_dsp_wavetables import WavetableOscillator
+from util_buffers import BufferPool, RingBuffer
+
+fs = 48000
+noise = np.random.default_rng(5).uniform(-1.0, 1.0, (2, 1000))
+
+
+def test_ring_buffer_wraps_around():
+    ring = RingBuffer(8, channels=2)
+    assert ring.write(noise[:, :6]) == 6
+    out = np.zeros((2, 4))
+    assert ring.read(out) == 4 and np.array_equal(out, noise[:, :4])
+
+    # only 6 of these fit, the write wraps past the end of the array
+    assert ring.write(noise[:, 6:16]) == 6 and ring.writable == 0
+    views = ring.peek(8)
+    assert len(views) == 2 and np.array_equal(np.concatenate(views, axis=-1), noise[:, 4:12])
+    ring.consume(3)
+    out = np.zeros((2, 10))
+    assert ring.read(out) == 5 and np.array_equal(out[:, :5], noise[:, 7:12]) and len(ring) == 0
+
+
+def test_ring_buffer_between_threads():
+    ring = RingBuffer(100)
+    signal = np.arange(20000, dtype=float)
+    received = np.zeros_like(signal)
+
+    def producer():
+        sent = 0
+        while sent < len(signal):
+            n = ring.write(signal[sent:sent + 37])
+            sent += n
+            if n == 0:
+                time.sleep(0)
+
+    thread = threading.Thread(target=producer)
+    thread.start()
+    done = 0
+    while done < len(signal):
+        n = ring.read(received[done:done + 64])
+        done += n
+        if n == 0:
+            time.sleep(0)
+    thread.join()
+    assert np.array_equal(received, signal)
+
+
+def test_buffer_pool_reuses_blocks():
+    pool = BufferPool((2, 128), size=2)
+    blocks = [pool.acquire() for _ in range(3)]
+    assert pool.allocated == 3 and len(pool) == 0
+    for block in blocks:
+        pool.release(block)
+    for _ in range(100):
+        with pool.borrowed() as block:
+            block[:] = 1.0
+    assert pool.allocated == 3 and len(pool) == 3
+    with pytest.raises(ValueError):
+        pool.release(np.zeros(128))
+
+
+@pytest.mark.parametrize('make, block', [
+    (lambda: adf.Biquad(adf.bi_quad_coeffs(5, 1000, fs, 0.707, 0.0)), noise),
+    (lambda: adf.ParametricEQ(fs, [(9, 1000, 1.0, 6.0), (10, 100, 0.7, -3.0)]), noise),
+    (lambda: ada.EnvelopeFollower(fs, mode='rms'), noise),
+    (lambda: ada.Compressor(fs, threshold_db=-12.0), noise),
+    (lambda: ada.LookaheadLimiter(fs, ceiling_db=-6.0), noise),
+    (lambda: FirFilter(np.hanning(200), block_size=64), noise),
+    (lambda: OscillatorBank(fs, [100.0, 300.0], [1.0, 0.5]), 1000),
+    (lambda: WavetableOscillator(fs, 440.0), 1000),
+])
+def test_process_into_caller_memory(make, block):
+    exp = make().process(block)
+    out = np.empty(exp.shape)
+    assert make().process(block, out=out) is out
+    assert np.array_equal(out, exp)
+
+
+@pytest.mark.parametrize('run', [
+    lambda out=None: adf.iir_filter(noise, [0.2, 0.1], [1.0, -0.6], out=out)[0],
+    lambda out=None: adf.iir_filter(noise.astype(np.float32), [0.2, 0.1], [1.0, -0.6], out=out)[0],
+    lambda out=None: adf.iir_filter(noise, [[0.2, 0.1], [0.5, 0.0]], [[1.0, -0.6], [1.0, 0.3]], out=out)[0],
+    lambda out=None: adf.sos_filter(noise, [[0.2, 0.1, 0.0, 1.0, -0.6, 0.1]], out=out)[0],
+    lambda out=None: adf.one_zero_filter(noise, 0.5, 0.5, out=out),
+    lambda out=None: adf.one_pole_filter(noise, 0.3, -0.7, out=out),
+    lambda out=None: adf.simple_resonator(noise, fs, 1000, 0.05, out=out),
+    lambda out=None: adf.second_order_lowpass(noise, fs, 1000, 0.707, out=out),
+    lambda out=None: adf.bi_quad(noise, adf.bi_quad_coeffs(5, 1000, fs, 0.707, 0.0), out=out),
+    lambda out=None: adf.modulated_bi_quad(noise, 5, fs, np.linspace(200, 2000, 10), 0.707, out=out),
+    lambda out=None: uw.wv_sine(fs, 0.2, 440.0, out=out),
+    lambda out=None: uw.wv_cosine(fs, 0.2, 440.0, out=out),
+    lambda out=None: uw.wv_sawtooth(fs, 0.2, 440.0, out=out),
+    lambda out=None: uw.wv_square(fs, 0.2, 440.0, out=out),
+    lambda out=None: uw.wv_triangle(fs, 0.2, 440.0, out=out),
+])
+def test_functions_into_caller_memory(run):
+    exp = run()
+    out = np.empty(exp.shape, dtype=exp.dtype)
+    assert run(out=out) is out
+    assert np.array_equal(out, exp)
+
+
+def test_resampler_process_into_caller_memory():
+    exp = Resampler(fs, 44100).process(noise)
+    out = np.empty(noise.shape[:-1] + (noise.shape[-1] * 44100 // fs + 2,))
+    y = Resampler(fs, 44100).process(noise, out=out)
+    assert np.shares_memory(y, out) and np.array_equal(y, exp)
+    with pytest.raises(ValueError):
+        Resampler(fs, 44100).process(noise, out=out[..., :10])
+
+
+def test_wv_blocks_reuses_one_buffer():
+    out = np.empty(1000)
+    blocks = [b.copy() for b in uw.wv_blocks('sine', fs, 0.1, 440.0, block_size=1000, out=out)]
+    assert np.array_equal(np.concatenate(blocks), np.concatenate(list(uw.wv_blocks('sine', fs, 0.1, 440.0, 1000))))
+
+
+def test_graph_renders_sources_into_node_buffers():
+    graph = AudioGraph(block_size=128)
+    osc = WavetableOscillator(fs, 440.0)
+    graph.add_source('osc', osc)
+    graph.add('eq', adf.BiquadCascade([adf.bi_quad_coeffs(5, 1000, fs, 0.707, 0.0)]), 'osc')
+    buffers = [graph.buffer(name) for name in graph.compile().order]
+    graph.process()
+    assert all(graph.buffer(name) is b for name, b in zip(graph.order, buffers))
+    assert np.array_equal(graph.buffer('osc'), WavetableOscillator(fs, 440.0).process(128))
@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+import util_signals as us
+
+
+def test_default_signals_match_the_500_sample_builders():
+    assert us.nyq().shape == (500,)
+    assert list(us.nyq()[:4]) == [1.0, -1.0, 1.0, -1.0]
+    assert list(us.half_nyq()[-4:]) == [0.0, 1.0, 0.0, -1.0]
+    assert list(us.qtr_nyq()[-4:]) == [0.0, 0.707, 1.0, 0.707]
+    assert np.flatnonzero(us.impls()).tolist() == [1]
+    assert us.step()[0] == 0.0 and us.step()[1:].min() == 1.0
+
+
+@pytest.mark.parametrize('fn', [us.nyq, us.half_nyq, us.qtr_nyq, us.impls, us.step])
+def test_signals_are_cached_and_read_only(fn):
+    x = fn(1000)
+    assert fn(1000) is x
+    with pytest.raises(ValueError):
+        x[0] = 2.0
+    y = x.copy()
+    y[0] = 2.0
+
+
+def test_dtype_and_channels():
+    x = us.qtr_nyq(10, dtype=np.float32, channels=3)
+    assert x.shape == (3, 10) and x.dtype == np.float32
+    assert np.array_equal(x[2], us.qtr_nyq(10, dtype=np.float32))
+    assert not x.flags.writeable
+
+
+def test_long_signals_are_not_cached():
+    n = us.CACHE_MAX_BYTES // 8 + 1
+    x = us.step(n)
+    assert us.step(n) is not x and np.array_equal(us.step(n), x) and not x.flags.writeable
@@ -0,0 +1,91 @@
+import struct
+
+import numpy as np
+import pytest
+from scipy.io import wavfile
+
+from util_wave_files import WavWriter, read_wav, read_wav_blocks, wav_info
+
+fs = 48000
+tone = 0.5 * np.vstack((np.cos(2 * np.pi * 220 * np.arange(4801) / fs),
+                        np.cos(2 * np.pi * 360 * np.arange(4801) / fs)))
+
+
+@pytest.mark.parametrize('sample_format, tolerance', [('int16', 2.0 ** -15), ('int24', 2.0 ** -23),
+                                                      ('int32', 2.0 ** -31), ('float32', 1e-7)])
+def test_round_trip_in_blocks(tmp_path, sample_format, tolerance):
+    """ Blocks written one at a time read back in blocks of another size """
+    path = tmp_path / f'{sample_format}.wav'
+    with WavWriter(path, fs, 2, sample_format) as writer:
+        for i in range(0, tone.shape[1], 1000):
+            writer.write(tone[:, i:i + 1000])
+
+    info = wav_info(path)
+    assert (info.fs, info.channels, info.n_frames) == (fs, 2, tone.shape[1])
+    blocks = list(read_wav_blocks(path, 512, dtype=np.float64))
+    assert all(b.shape == (2, 512) for b in blocks[:-1])
+    assert np.max(np.abs(np.concatenate(blocks, axis=1) - tone)) <= tolerance
+
+
+def test_files_are_readable_by_scipy(tmp_path):
+    """ The patched header is a valid WAV header """
+    path = tmp_path / 'mono.wav'
+    with WavWriter(path, fs, 1, 'int16') as writer:
+        writer.write(tone[0])
+    rate, data = wavfile.read(path)
+    assert rate == fs
+    assert np.array_equal(data, np.rint(tone[0] * 32768).astype(np.int16))
+
+
+def test_reads_scipy_written_files(tmp_path):
+    """ Files from other writers read back the same """
+    path = tmp_path / 'stereo.wav'
+    wavfile.write(path, fs, tone.T.astype(np.float32))
+    res, rate = read_wav(path)
+    assert rate == fs
+    assert np.array_equal(res, tone.astype(np.float32))
+
+
+def test_float_sample_rate(tmp_path):
+    with WavWriter(tmp_path / 'a.wav', 44100.0, 2) as writer:
+        writer.write(tone)
+    assert wav_info(tmp_path / 'a.wav').fs == 44100
+
+
+@pytest.mark.parametrize('size', [0, 0xFFFFFFFF])
+def test_streamed_header_stops_at_trailing_chunk(tmp_path, size):
+    """ a data size that was never patched runs up to the next chunk, not the end of the file """
+    path = tmp_path / 'streamed.wav'
+    with WavWriter(path, fs, 2, 'int16') as writer:
+        writer.write(tone)
+    info = wav_info(path)
+    with open(path, 'r+b') as f:
+        f.seek(info.data_offset - 4)
+        f.write(struct.pack('<I', size))
+        f.seek(0, 2)
+        info_chunk = b'INFO' + b'ISFT' + struct.pack('<I', 5) + b'test\x00\x00'
+        f.write(b'LIST' + struct.pack('<I', len(info_chunk)) + info_chunk)
+
+    assert wav_info(path).n_frames == tone.shape[1]
+    res, _ = read_wav(path, dtype=np.float64)
+    assert np.max(np.abs(res - tone)) <= 2.0 ** -15
+
+    # without a trailing chunk the data runs to the end of the file
+    with open(path, 'r+b') as f:
+        f.truncate(info.data_offset + 4 * tone.shape[1])
+    assert wav_info(path).n_frames == tone.shape[1]
+
+
+def test_data_past_4_gib_gets_streaming_sizes(tmp_path):
+    """ the sizes don't fit 32 bits, so the header says 'read to the end' instead of failing on close """
+    path = tmp_path / 'long.wav'
+    writer = WavWriter(path, fs, 2, 'float32')
+    writer.write(tone)
+    writer.n_frames = 600_000_000  # as if 4.8 GB had been written
+    writer.close()
+    assert writer._file.closed
+
+    with open(path, 'rb') as f:
+        header = f.read(44)
+    assert struct.unpack('<I', header[4:8])[0] == struct.unpack('<I', header[40:44])[0] == 0xFFFFFFFF
+    assert wav_info(path).n_frames == tone.shape[1]
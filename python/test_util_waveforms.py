@@ -0,0 +1,44 @@
+from fractions import Fraction
+
+import numpy as np
+import pytest
+from scipy import signal
+
+import util_waveforms as uw
+
+fs = 48000
+
+
+def test_waveforms_match_the_scipy_definitions():
+    t = np.arange(0.25 * fs) / fs
+    x = 2 * np.pi * 440.0 * t
+    assert np.allclose(uw.wv_sine(fs, 0.25, 440.0), np.sin(x), atol=1e-12)
+    assert np.allclose(uw.wv_cosine(fs, 0.25, 440.0), np.cos(x), atol=1e-12)
+    assert np.allclose(uw.wv_sawtooth(fs, 0.25, 440.0), signal.sawtooth(x), atol=1e-12)
+    assert np.array_equal(uw.wv_square(fs, 0.25, 440.0), signal.square(x))
+    assert np.allclose(uw.wv_triangle(fs, 0.25, 440.0), signal.sawtooth(x, 0.5), atol=1e-12)
+
+
+@pytest.mark.parametrize('waveform', uw.WAVEFORMS)
+def test_blocks_join_into_the_whole_waveform(waveform):
+    whole = getattr(uw, 'wv_' + waveform)(fs, 0.3, 1234.5)
+    blocks = list(uw.wv_blocks(waveform, fs, 0.3, 1234.5, block_size=1000))
+    assert [len(b) for b in blocks[-2:]] == [1000, len(whole) % 1000]
+    assert np.allclose(np.concatenate(blocks), whole, rtol=0, atol=1e-12)
+
+
+def test_no_phase_drift_after_hours():
+    """ Ten hours in, a block starts on exactly the right phase """
+    freq = 997.3
+    start = 10 * 3600 * fs
+    block = next(uw.wv_blocks('sine', fs, None, freq, block_size=64, start=start))
+    exp = [np.sin(2 * np.pi * float(Fraction(freq) * (start + k) / fs % 1)) for k in range(64)]
+    assert np.max(np.abs(block - exp)) < 1e-12
+
+
+def test_float32_output():
+    block = next(uw.wv_blocks('triangle', fs, None, 440.0, 256, dtype=np.float32))
+    assert block.dtype == np.float32 and len(block) == 256
+    assert uw.wv_square(fs, 0.01, 440.0, dtype=np.float32).dtype == np.float32
+    with pytest.raises(ValueError):
+        next(uw.wv_blocks('noise', fs, 1.0, 440.0))
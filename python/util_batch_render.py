@@ -0,0 +1,204 @@
+"""
+Batch-render a directory of WAV files through a filter chain.
+
+    python python/util_batch_render.py in_dir out_dir --chain "dc,biquad:6:30:0.707,lowpass:8000:0.707"
+
+Chain stages (comma separated, parameters separated by colons):
+    dc[:pole]                      DcBlocker
+    biquad:kind:fc:q[:peak_gain]   bi_quad_coeffs design (see BI_QUAD_KINDS)
+    resonator:fc:q                 simple resonator
+    lowpass:fc:q                   second order LPF (kLPF2)
+
+With --fs every file is first resampled to that rate (polyphase, see
+algo_dsp_resample), so mixed 44.1/48/96 kHz inputs come out at one rate.
+
+Files are spread over a process pool (one worker per core by default) and each
+file is streamed through the chain in blocks, so memory use doesn't depend on
+file length. Adjacent biquad-type stages run as one BiquadCascade pass.
+
+With --split files are rendered one at a time instead, each cut into segments
+that the workers filter in parallel (see algo_dsp_parallel) - for a few very
+long files rather than many short ones. The whole file is held in memory.
+
+A file that can't be rendered is reported as FAILED and the run goes on; the
+summary line counts the failures and the exit status is 1 if there were any.
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import numpy as np
+
+from algo_dsp_filters import (BiquadCascade, DcBlocker, bi_quad_coeffs, second_order_lowpass_coefficients,
+                              simple_resonator_coefficients)
+from algo_dsp_parallel import parallel_sos_filter
+from algo_dsp_resample import Resampler, resample
+from util_wave_files import WavWriter, read_wav, read_wav_blocks, wav_info
+
+
+def parse_chain(spec):
+    """ "dc,biquad:5:1000:0.707" -> [('dc', []), ('biquad', [5.0, 1000.0, 0.707])] """
+    stages = []
+    for stage in spec.split(','):
+        name, *params = stage.strip().split(':')
+        if name not in ('dc', 'biquad', 'resonator', 'lowpass'):
+            raise ValueError(f"unknown chain stage '{name}'")
+        stages.append((name, [float(p) for p in params]))
+    return stages
+
+
+def _section(name, params, fs):
+    """ [a0, a1, a2, b1, b2] for the biquad-type stages """
+    if name == 'biquad':
+        kind, fc, q = int(params[0]), params[1], params[2]
+        return bi_quad_coeffs(kind, fc, fs, q, params[3] if len(params) > 3 else 0.0)
+    if name == 'resonator':
+        _, _, b2, b1, a0 = simple_resonator_coefficients(fs, params[0], params[1])
+        return [a0, 0.0, 0.0, b1, b2]
+    a0, a1, a2, b1, b2, c0, d0 = second_order_lowpass_coefficients(fs, params[0], params[1])
+    return [d0 + c0 * a0, c0 * a1, c0 * a2, c0 * b1, c0 * b2]
+
+
+def build_chain(stages, fs):
+    """ Stateful block processors for one file; runs of biquad-type stages become one cascade """
+    chain = []
+    sections = []
+    for name, params in stages:
+        if name == 'dc':
+            if sections:
+                chain.append(BiquadCascade(sections))
+                sections = []
+            dc_blocker = DcBlocker(streaming=True)
+            if params:
+                dc_blocker.set_pole(params[0])
+            chain.append(dc_blocker)
+        else:
+            sections.append(_section(name, params, fs))
+    if sections:
+        chain.append(BiquadCascade(sections))
+    return chain
+
+
+def chain_sos(stages, fs):
+    """ The whole chain as one [b0, b1, b2, 1, a1, a2] row per stage; the DC blocker is a first-order row """
+    rows = []
+    for name, params in stages:
+        if name == 'dc':
+            pole = params[0] if params else DcBlocker().pole
+            rows.append([1.0, -1.0, 0.0, 1.0, -pole, 0.0])
+        else:
+            a0, a1, a2, b1, b2 = _section(name, params, fs)
+            rows.append([a0, a1, a2, 1.0, b1, b2])
+    return np.array(rows)
+
+
+def render_file(in_path, out_path, stages, block_size=4096, sample_format=None, fs=None):
+    """ Stream one file through the chain, resampled to fs first if given; returns (in_path, samples, seconds) """
+    start = time.perf_counter()
+    info = wav_info(in_path)
+    fs = fs or info.fs
+    resampler = Resampler(info.fs, fs) if fs != info.fs else None
+    chain = build_chain(stages, fs)
+
+    with WavWriter(out_path, fs, info.channels, sample_format or info.sample_format) as writer:
+        for block in read_wav_blocks(in_path, block_size, dtype=float):
+            if resampler:
+                block = resampler.process(block)
+            writer.write(_run_chain(chain, block))
+        if resampler:
+            writer.write(_run_chain(chain, resampler.flush()))
+
+    return in_path, info.n_frames * info.channels, time.perf_counter() - start
+
+
+def render_file_split(in_path, out_path, stages, workers=None, sample_format=None, fs=None):
+    """ Render one file with its samples split over worker processes; returns (in_path, samples, seconds) """
+    start = time.perf_counter()
+    info = wav_info(in_path)
+    samples, _ = read_wav(in_path, dtype=float)
+    fs = fs or info.fs
+    if fs != info.fs:
+        samples = resample(samples, info.fs, fs)
+    y, _ = parallel_sos_filter(samples, chain_sos(stages, fs), workers=workers)
+
+    with WavWriter(out_path, fs, info.channels, sample_format or info.sample_format) as writer:
+        writer.write(y)
+
+    return in_path, info.n_frames * info.channels, time.perf_counter() - start
+
+
+def _run_chain(chain, block):
+    for processor in chain:
+        block = processor.process(block)
+    return block
+
+
+def render_directory(in_dir, out_dir, stages, block_size=4096, workers=None, sample_format=None, fs=None,
+                     report=print, split=False):
+    """ Render every .wav in in_dir to out_dir (split: one file at a time over all workers);
+    returns (files, samples, seconds, failed). A file that fails is reported, its partial
+    output removed, and the run carries on with the rest. """
+    os.makedirs(out_dir, exist_ok=True)
+    names = sorted(n for n in os.listdir(in_dir) if n.lower().endswith('.wav'))
+    paths = [(os.path.join(in_dir, n), os.path.join(out_dir, n)) for n in names]
+    start = time.perf_counter()
+
+    if split:
+        jobs = [(i, o, partial(render_file_split, i, o, stages, workers, sample_format, fs)) for i, o in paths]
+        total_samples, failed = _report_files(jobs, report)
+    else:
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+            jobs = [(i, o, pool.submit(render_file, i, o, stages, block_size, sample_format, fs).result)
+                    for i, o in paths]
+            total_samples, failed = _report_files(jobs, report)
+
+    elapsed = time.perf_counter() - start
+    report(f"{len(names)} files ({failed} failed), {total_samples} samples in {elapsed:.3f} s "
+           f"({len(names) / max(elapsed, 1e-9):.2f} files/s, {total_samples / max(elapsed, 1e-9):.0f} samples/s)")
+    return len(names), total_samples, elapsed, failed
+
+
+def _report_files(jobs, report):
+    """ call each (in_path, out_path, result) job's result() and report it; returns (samples, failed) """
+    total_samples = 0
+    failed = 0
+    for in_path, out_path, result in jobs:
+        try:
+            _, samples, seconds = result()
+        except Exception as error:
+            failed += 1
+            report(f"{os.path.basename(in_path)}: FAILED - {type(error).__name__}: {error}")
+            if os.path.exists(out_path):
+                os.remove(out_path)
+            continue
+        total_samples += samples
+        report(f"{os.path.basename(in_path)}: {samples} samples in {seconds:.3f} s "
+               f"({samples / max(seconds, 1e-9):.0f} samples/s)")
+    return total_samples, failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render a directory of WAV files through a filter chain.")
+    parser.add_argument('in_dir')
+    parser.add_argument('out_dir')
+    parser.add_argument('--chain', required=True, help="e.g. dc,biquad:6:30:0.707,lowpass:8000:0.707")
+    parser.add_argument('--block-size', type=int, default=4096)
+    parser.add_argument('--workers', type=int, default=None, help="default: one per core")
+    parser.add_argument('--format', dest='sample_format', default=None,
+                        help="int16, int24, int32 or float32 (default: same as the input)")
+    parser.add_argument('--fs', type=int, default=None, help="resample to this rate (default: keep each file's)")
+    parser.add_argument('--split', action='store_true',
+                        help="render one file at a time, split over the workers (for a few very long files)")
+    args = parser.parse_args(argv)
+
+    _, _, _, failed = render_directory(args.in_dir, args.out_dir, parse_chain(args.chain), args.block_size,
+                                       args.workers, args.sample_format, args.fs, split=args.split)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,293 @@
+"""
+Benchmarks for every public routine in algo_dsp_filters, util_functions,
+util_waveforms and util_signals.
+
+    python python/util_benchmarks.py                          # full run, 64 .. 10M samples
+    python python/util_benchmarks.py --max-length 100000      # quicker run
+    python python/util_benchmarks.py --json bench.json        # save machine-readable results
+    python python/util_benchmarks.py --compare bench.json     # show the change against a saved run
+    python python/util_benchmarks.py --imports                # import times; exit 1 over budget
+
+Each case is timed (best of --repeat) for every signal length, for mono and
+multichannel input where the routine takes a signal, and for every block size
+where it is a streaming processor. Peak memory is measured on a separate run
+under tracemalloc (NumPy reports its allocations there) so it doesn't skew the
+timings. Results record the git commit so runs can be compared across commits.
+
+--imports times importing each CORE_MODULES module in a fresh interpreter
+(after numpy, which everything needs) and fails if one takes longer than
+IMPORT_BUDGET or pulls in matplotlib or scipy: worker processes are short-lived,
+so every spawn pays these costs again.
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+import algo_dsp_filters as adf
+import util_functions as uf
+import util_signals as us
+import util_waveforms as uw
+
+LENGTHS = [64, 1024, 16384, 262144, 1048576, 10000000]
+CHANNELS = [1, 8]
+BLOCK_SIZES = [64, 512, 4096]
+FS = 48000
+
+# the numeric core: importable without matplotlib, and without scipy until a filter actually runs
+CORE_MODULES = ['algo_dsp_filters', 'algo_dsp_response', 'algo_dsp_amplitude', 'algo_dsp_resample',
+                'algo_dsp_oscillators', 'algo_dsp_wavetables', 'algo_dsp_spectrum', 'algo_audio_graph',
+                'util_signals', 'util_waveforms', 'util_wave_files', 'util_buffers', 'util_functions']
+HEAVY_MODULES = ('matplotlib', 'scipy')
+IMPORT_BUDGET = 0.1  # seconds per module, on top of numpy
+
+# routines that only plot or print; there is nothing to time
+SKIPPED = {'util_functions': ['print_signal_function_output', 'simple_resonator_coeffs']}
+
+lpf = [0.0675, 0.135, 0.0675, -1.143, 0.4128]
+eq_bands = [(10, 120.0, 0.707, 3.0), (9, 1000.0, 2.0, -6.0), (9, 4000.0, 1.0, 4.0), (11, 8000.0, 0.707, -2.0)]
+
+
+def _points(n):
+    return np.geomspace(20.0, 20000.0, n)
+
+
+def _cold(fn, n):
+    us._cached_signal.cache_clear()
+    return fn(n)
+
+
+#####################################################
+#
+# Cases
+#    signal:   fn(x) for x of shape (n,) or (channels, n)
+#    stream:   factory() -> processor, fed block_size blocks through process()
+#    generate: fn(n) renders n samples
+#    design:   fn(n) designs n coefficient sets
+#
+#####################################################
+
+CASES = [
+    ('algo_dsp_filters', 'iir_filter', 'signal', lambda x: adf.iir_filter(x, [0.2, 0.4, 0.2], [1.0, -0.5, 0.3])),
+    ('algo_dsp_filters', 'sos_filter', 'signal', lambda x: adf.sos_filter(x, adf.ParametricEQ(FS, eq_bands).sos)),
+    ('algo_dsp_filters', 'modulated_filter', 'signal',
+     lambda x: adf.modulated_filter(x, adf.bi_quad_coeffs(5, _points(-(-x.shape[-1] // 32)), FS, 0.707, 0.0))),
+    ('algo_dsp_filters', 'one_zero_filter', 'signal', lambda x: adf.one_zero_filter(x, 0.5, 0.5)),
+    ('algo_dsp_filters', 'one_pole_filter', 'signal', lambda x: adf.one_pole_filter(x, 0.5, 0.5)),
+    ('algo_dsp_filters', 'simple_resonator', 'signal', lambda x: adf.simple_resonator(x, FS, 1000.0, 10.0)),
+    ('algo_dsp_filters', 'second_order_lowpass', 'signal', lambda x: adf.second_order_lowpass(x, FS, 1000.0, 0.707)),
+    ('algo_dsp_filters', 'bi_quad', 'signal', lambda x: adf.bi_quad(x, lpf)),
+    ('algo_dsp_filters', 'modulated_bi_quad', 'signal',
+     lambda x: adf.modulated_bi_quad(x, 5, FS, _points(x.shape[-1]), 0.707)),
+    ('algo_dsp_filters', 'modulated_second_order_lowpass', 'signal',
+     lambda x: adf.modulated_second_order_lowpass(x, FS, _points(x.shape[-1]), 0.707)),
+    ('algo_dsp_filters', 'DcBlocker.process', 'signal', lambda x: adf.DcBlocker().process(x)),
+    ('algo_dsp_filters', 'DcBlocker.process(streaming)', 'stream', lambda: adf.DcBlocker(streaming=True)),
+    ('algo_dsp_filters', 'Biquad.process', 'stream', lambda: adf.Biquad(lpf)),
+    ('algo_dsp_filters', 'BiquadCascade.process', 'stream', lambda: adf.BiquadCascade([lpf] * 4)),
+    ('algo_dsp_filters', 'ParametricEQ.process', 'stream', lambda: adf.ParametricEQ(FS, eq_bands)),
+    ('algo_dsp_filters', 'bi_quad_coeffs', 'design', lambda n: adf.bi_quad_coeffs(9, _points(n), FS, 2.0, 6.0)),
+    ('algo_dsp_filters', 'simple_resonator_coefficients', 'design',
+     lambda n: adf.simple_resonator_coefficients(FS, _points(n), 10.0)),
+    ('algo_dsp_filters', 'second_order_lowpass_coefficients', 'design',
+     lambda n: adf.second_order_lowpass_coefficients(FS, _points(n), 0.707)),
+
+    ('util_functions', 'wv_sine', 'generate', lambda n: uf.wv_sine(440.0, np.arange(n) / FS)),
+    ('util_functions', 'wv_cosine', 'generate', lambda n: uf.wv_cosine(440.0, np.arange(n) / FS)),
+    ('util_functions', 'wv_sawtooth', 'generate', lambda n: uf.wv_sawtooth(440.0, np.arange(n) / FS)),
+    ('util_functions', 'wv_square', 'generate', lambda n: uf.wv_square(440.0, np.arange(n) / FS)),
+    ('util_functions', 'first_order_feed_forward', 'signal',
+     lambda x: uf.first_order_feed_forward(x[..., 1:], x[..., :-1], 0.5, 0.5)),
+    ('util_functions', 'first_order_feedback', 'signal',
+     lambda x: uf.first_order_feedback(x[..., 1:], x[..., :-1], 0.5, 0.5)),
+    ('util_functions', 'bi_quad', 'signal', lambda x: uf.bi_quad(x, lpf)),
+
+    ('util_waveforms', 'wv_sine', 'generate', lambda n: uw.wv_sine(FS, n / FS, 440.0)),
+    ('util_waveforms', 'wv_cosine', 'generate', lambda n: uw.wv_cosine(FS, n / FS, 440.0)),
+    ('util_waveforms', 'wv_sawtooth', 'generate', lambda n: uw.wv_sawtooth(FS, n / FS, 440.0)),
+    ('util_waveforms', 'wv_square', 'generate', lambda n: uw.wv_square(FS, n / FS, 440.0)),
+    ('util_waveforms', 'wv_triangle', 'generate', lambda n: uw.wv_triangle(FS, n / FS, 440.0)),
+    ('util_waveforms', 'wv_blocks', 'generate',
+     lambda n: [block for block in uw.wv_blocks('sine', FS, n / FS, 440.0, dtype=np.float32)]),
+    ('util_waveforms', 'two_sines', 'generate', lambda n: uw.two_sines(n, 440.0, 660.0, 1.0, 0.5, 1)),
+
+    # cold: the lru cache is emptied first, or every run after the first would time a cache hit
+    ('util_signals', 'nyq', 'generate', lambda n: _cold(us.nyq, n)),
+    ('util_signals', 'half_nyq', 'generate', lambda n: _cold(us.half_nyq, n)),
+    ('util_signals', 'qtr_nyq', 'generate', lambda n: _cold(us.qtr_nyq, n)),
+    ('util_signals', 'impls', 'generate', lambda n: _cold(us.impls, n)),
+    ('util_signals', 'step', 'generate', lambda n: _cold(us.step, n)),
+]
+
+
+#####################################################
+#
+# Measurement
+#
+#####################################################
+
+
+def _time(call, repeat):
+    """ best wall time of repeat calls """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        call()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _peak_memory(call):
+    """ peak bytes NumPy/Python allocated during one call """
+    tracemalloc.start()
+    try:
+        call()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def _stream(factory, x, block_size):
+    def call():
+        processor = factory()
+        for start in range(0, x.shape[-1], block_size):
+            processor.process(x[..., start:start + block_size])
+    return call
+
+
+def _record(module, routine, mode, n, channels, block_size, seconds, peak):
+    samples = n * channels
+    return {'module': module, 'routine': routine, 'mode': mode, 'n_samples': n, 'channels': channels,
+            'block_size': block_size, 'seconds': seconds, 'samples_per_sec': samples / max(seconds, 1e-12),
+            'peak_bytes': peak}
+
+
+def run_benchmarks(lengths=LENGTHS, channels=CHANNELS, block_sizes=BLOCK_SIZES, repeat=3, only=None, report=None):
+    """ Run every case; returns a list of result records """
+    rng = np.random.default_rng(0)
+    records = []
+
+    for module, routine, mode, fn in CASES:
+        if only and only not in f"{module}.{routine}":
+            continue
+
+        runs = []
+        for n in lengths:
+            if mode in ('generate', 'design'):
+                runs.append((n, 1, None, lambda fn=fn, n=n: fn(n)))
+                continue
+            for ch in channels:
+                x = rng.uniform(-1.0, 1.0, n if ch == 1 else (ch, n))
+                if mode == 'signal':
+                    runs.append((n, ch, None, lambda fn=fn, x=x: fn(x)))
+                else:
+                    runs.extend((n, ch, bs, _stream(fn, x, bs)) for bs in block_sizes if bs <= n)
+
+        for n, ch, bs, call in runs:
+            seconds = _time(call, repeat)
+            record = _record(module, routine, mode, n, ch, bs, seconds, _peak_memory(call))
+            records.append(record)
+            if report:
+                report(_format(record))
+
+    return records
+
+
+def import_time(module, repeat=3):
+    """ best time to import module in a fresh interpreter that has already imported numpy,
+    and which HEAVY_MODULES the import loaded """
+    code = ("import sys, time; import numpy; start = time.perf_counter(); import " + module + "; "
+            "print(time.perf_counter() - start); print(' '.join(m for m in " + repr(HEAVY_MODULES) +
+            " if m in sys.modules))")
+    best, loaded = float('inf'), []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True,
+                             cwd=os.path.dirname(os.path.abspath(__file__))).stdout.splitlines()
+        best = min(best, float(out[0]))
+        loaded = out[1].split() if len(out) > 1 else []
+    return best, loaded
+
+
+def run_import_benchmarks(modules=CORE_MODULES, repeat=3, report=None):
+    """ import_time for every module; returns records with an 'ok' flag against the budget """
+    records = []
+    for module in modules:
+        seconds, loaded = import_time(module, repeat)
+        record = {'module': module, 'seconds': seconds, 'loaded': loaded,
+                  'ok': seconds <= IMPORT_BUDGET and not loaded}
+        records.append(record)
+        if report:
+            report(f"{module:<24} {seconds * 1000:8.1f} ms  {' '.join(loaded) or '-':<18} "
+                   f"{'ok' if record['ok'] else 'OVER BUDGET'}")
+    return records
+
+
+def _format(record):
+    name = f"{record['module']}.{record['routine']}"
+    block = f" block={record['block_size']}" if record['block_size'] else ""
+    return (f"{name:<52} n={record['n_samples']:<9} ch={record['channels']:<2}"
+            f"{block:<11} {record['samples_per_sec']:>14.0f} samples/s  peak {record['peak_bytes'] / 1e6:9.2f} MB")
+
+
+def _metadata():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        commit = ''
+    return {'commit': commit, 'python': platform.python_version(), 'numpy': np.__version__,
+            'machine': platform.machine(), 'time': time.strftime('%Y-%m-%dT%H:%M:%S')}
+
+
+def compare(old_records, new_records, report=print):
+    """ print the samples/s ratio new / old for every case the two runs share """
+    def key(r):
+        return r['module'], r['routine'], r['n_samples'], r['channels'], r['block_size']
+
+    old = {key(r): r for r in old_records}
+    for record in new_records:
+        before = old.get(key(record))
+        if before:
+            ratio = record['samples_per_sec'] / max(before['samples_per_sec'], 1e-12)
+            report(f"{_format(record)}  x{ratio:.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the DSP routines.")
+    parser.add_argument('--lengths', type=int, nargs='+', default=LENGTHS)
+    parser.add_argument('--max-length', type=int, default=None, help="drop lengths above this")
+    parser.add_argument('--channels', type=int, nargs='+', default=CHANNELS)
+    parser.add_argument('--block-sizes', type=int, nargs='+', default=BLOCK_SIZES)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--only', default=None, help="substring of module.routine to run")
+    parser.add_argument('--json', default=None, help="write results here")
+    parser.add_argument('--compare', default=None, help="results file from an earlier run")
+    parser.add_argument('--imports', action='store_true', help="time the CORE_MODULES imports instead")
+    args = parser.parse_args(argv)
+
+    if args.imports:
+        records = run_import_benchmarks(repeat=args.repeat, report=print)
+        return 0 if all(r['ok'] for r in records) else 1
+
+    lengths = [n for n in args.lengths if args.max_length is None or n <= args.max_length]
+    records = run_benchmarks(lengths, args.channels, args.block_sizes, args.repeat, args.only,
+                             report=None if args.compare else print)
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f)['results'], records)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'metadata': _metadata(), 'results': records}, f, indent=1)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,145 @@
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+
+#####################################################
+#
+# Block buffers for real-time loops
+#
+#    Blocks are (n_samples,) for mono and (channels, n_samples) otherwise, as
+#    everywhere else. Nothing here allocates once it is set up:
+#      - RingBuffer: a FIFO of samples over one preallocated array, safe for
+#        one producer thread and one consumer thread without a lock
+#      - BufferPool: blocks of one shape handed out and taken back
+#      - into(out, y): what every processor's process(..., out=None) uses to
+#        land its result in caller-owned memory
+#
+#####################################################
+
+
+def into(out, y):
+    """ y itself when out is None, else y copied into out (and out returned) """
+    if out is None:
+        return y
+    np.copyto(out, y)
+    return out
+
+
+class RingBuffer:
+    """
+    Single-producer / single-consumer FIFO over a preallocated array.
+    Only write() moves the write count and only read()/consume()/clear() move
+    the read count, each after its copy is done, so a producer thread and a
+    consumer thread can share one buffer without a lock: each count is a
+    plain int published by a single store.
+    """
+    def __init__(self, capacity, channels=1, dtype=np.float64):
+        self.capacity = capacity
+        self.channels = channels
+        self._data = np.zeros((capacity,) if channels == 1 else (channels, capacity), dtype=dtype)
+        self._written = 0
+        self._read = 0
+
+    def __str__(self):
+        return f"capacity = {self.capacity}, channels = {self.channels}, readable = {self.readable}"
+
+    def __len__(self):
+        return self.readable
+
+    @property
+    def readable(self):
+        return self._written - self._read
+
+    @property
+    def writable(self):
+        return self.capacity - (self._written - self._read)
+
+    def write(self, block):
+        """ (producer) append as much of block as fits; returns the number of samples taken """
+        block = np.asarray(block)
+        n = min(block.shape[-1], self.writable)
+        done = 0
+        for span in self._spans(self._written, n):
+            size = span.stop - span.start
+            self._data[..., span] = block[..., done:done + size]
+            done += size
+        self._written += n
+        return n
+
+    def read(self, out):
+        """ (consumer) fill out from the oldest samples; returns how many there were,
+        leaving the rest of out untouched when fewer than out.shape[-1] were available """
+        n = min(out.shape[-1], self.readable)
+        done = 0
+        for view in self.peek(n):
+            out[..., done:done + view.shape[-1]] = view
+            done += view.shape[-1]
+        self._read += n
+        return n
+
+    def peek(self, n):
+        """ (consumer) the oldest n samples (at most readable) as one or two views, without copying """
+        n = min(n, self.readable)
+        return [self._data[..., span] for span in self._spans(self._read, n) if span.stop > span.start]
+
+    def consume(self, n):
+        """ (consumer) drop the oldest n samples, e.g. after working on peek(n) in place """
+        self._read += min(n, self.readable)
+
+    def clear(self):
+        """ (consumer) drop everything written so far """
+        self._read = self._written
+
+    def _spans(self, position, n):
+        start = position % self.capacity
+        first = min(n, self.capacity - start)
+        return slice(start, start + first), slice(0, n - first)
+
+
+class BufferPool:
+    """
+    Reusable blocks of one shape and dtype. acquire() hands out a free block
+    and only allocates when none is left, so after warm-up a loop that gives
+    its blocks back with release() allocates nothing. `allocated` counts the
+    blocks created. acquire/release are safe across threads (deque pop/append).
+    """
+    def __init__(self, shape, dtype=np.float64, size=0):
+        self.shape = (shape,) if np.isscalar(shape) else tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.allocated = 0
+        self._free = deque()
+        for _ in range(size):
+            self._free.append(self._new())
+
+    def __str__(self):
+        return f"shape = {self.shape}, dtype = {self.dtype}, free = {len(self._free)}, allocated = {self.allocated}"
+
+    def __len__(self):
+        return len(self._free)
+
+    def acquire(self):
+        """ a block to write to; its contents are whatever the last user left """
+        try:
+            return self._free.pop()
+        except IndexError:
+            return self._new()
+
+    def release(self, block):
+        """ give a block back; it must be one of this pool's shape and dtype """
+        if block.shape != self.shape or block.dtype != self.dtype:
+            raise ValueError(f"block {block.shape} {block.dtype} does not fit a pool of {self.shape} {self.dtype}")
+        self._free.append(block)
+
+    @contextmanager
+    def borrowed(self):
+        """ with pool.borrowed() as block: ... - released on exit """
+        block = self.acquire()
+        try:
+            yield block
+        finally:
+            self.release(block)
+
+    def _new(self):
+        self.allocated += 1
+        return np.zeros(self.shape, dtype=self.dtype)
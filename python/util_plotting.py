@@ -1,9 +1,11 @@
 import numpy as np
 from scipy.fft import fft, fftshift
-from scipy import signal
 import matplotlib.pyplot as plt
 from matplotlib import patches
 
+from algo_dsp_response import response
+from algo_dsp_spectrum import magnitude_spectrum as spectrum
+
 
 def plot_waveform(title, x_label, y_label, x, y):
     """
@@ -49,6 +51,7 @@ def plot_fft_mag_phs(signal,
 
 def freqz(num, den, input_name):
     """ An attempt to recreate the output of freqz in Matlab.
+        Plots algo_dsp_response.response(num, den); use that directly for the numbers.
 
         Parameters
         ----------
@@ -58,11 +61,10 @@ def freqz(num, den, input_name):
               Denominator coefficients of discrete time system
         input_name : name on output chart
     """
-    # np.seterr(divide = 'ignore')  # hide warnings related to division with 0
-    w, h = signal.freqz(num, den)
+    w, magnitude, phase, _ = response(num, den)
 
     # define min and max values for the y axis
-    y_phase = np.degrees(np.unwrap(np.angle(h)) * 180 / np.pi)
+    y_phase = np.degrees(phase * 180 / np.pi)
     mina, max_a = np.min(y_phase), np.max(y_phase)
 
     if np.isnan(mina):
@@ -71,40 +73,12 @@ def freqz(num, den, input_name):
         max_a = 0.0
 
     # determine difference between y axis actual values
-    if max_a > mina:
-        diff = (max_a - mina) / 5
-    elif mina > max_a:
-        diff = (mina - max_a) / 5
-    else:
-        diff = 0
-
-    # fill the value list
-    val_list = [mina]
-    for x in range(1, 6):
-        val_list.append(mina + diff * x)
+    diff = abs(max_a - mina) / 5
+    val_list = [mina + diff * x for x in range(6)]
 
     # define min and max values for the y-axis labels
-    print("mina, mina = " + str(mina))
-    if mina == 0:
-        des_lower = 0
-        print("mina, des_lower = 0")
-    elif mina < 0:
-        des_lower = -100
-        print("mina, des_lower = -100")
-    else:
-        des_lower = 100
-        print("mina, des_lower = 100")
-
-    print("max_a, max_a = " + str(max_a))
-    if max_a == 0:
-        des_upper = 0
-        print("max_a, des_upper = 0")
-    elif max_a > 0:
-        des_upper = 100
-        print("max_a, des_upper = 100")
-    else:
-        des_upper = -100
-        print("max_a, des_upper = -100")
+    des_lower = 0 if mina == 0 else (-100 if mina < 0 else 100)
+    des_upper = 0 if max_a == 0 else (100 if max_a > 0 else -100)
 
     # fix if these values are equal - avoid 0 in yorm calc - FIX: This is probably not the right way to do this.
     if max_a == mina:
@@ -116,7 +90,7 @@ def freqz(num, den, input_name):
         des_upper = 1
         des_lower = 0
 
-    y_norm = [des_lower + (x - mina) * (des_upper - des_lower) / (max_a - mina) for x in y_phase]
+    y_norm = des_lower + (y_phase - mina) * (des_upper - des_lower) / (max_a - mina)
     minn, max_n = np.min(y_norm), np.max(y_norm)
 
     if np.isnan(minn):
@@ -125,12 +99,7 @@ def freqz(num, den, input_name):
         max_n = 0.0
 
     # determine difference between y axis normalized values
-    if max_n > minn:
-        diff_n = (max_n - minn) / 5
-    elif minn > max_n:
-        diff_n = (minn - max_n) / 5
-    else:
-        diff_n = 0
+    diff_n = abs(max_n - minn) / 5
 
     # fill the string list
     str_list = [str(int(minn))]
@@ -142,7 +111,7 @@ def freqz(num, den, input_name):
     # do plots
     plt.figure(figsize=(6, 2))
     plt.suptitle('Magnitude and Phase Responses - ' + str(input_name))
-    plt.plot(w, 20 * np.log10(abs(h)))
+    plt.plot(w, magnitude)
     plt.xlabel(r'Normalized Frequency ($\times \pi$ rad/sample)')
     plt.ylabel(r'Magnitude (dB)', fontsize=14)
     plt.grid(which='both', linestyle='-', color='grey')
@@ -157,7 +126,6 @@ def freqz(num, den, input_name):
     plt.xticks([0, 0.3, 0.6, 0.9, 1.2, 1.5, 1.8, 2.1, 2.4, 2.7, 3],
                ["0", "0.1", "0.2", "0.3", "0.4", "0.5", "0.6", "0.7", "0.8", "0.9", "1"])
     plt.yticks(val_list, str_list)
-    np.seterr(divide='warn')
 
 
 def zplane(b, a):
@@ -218,14 +186,11 @@ def zplane(b, a):
 
 def plot_magnitude_spectrum(sig, title, fs, freq_ratio=0.5):
     """
-    TODO: (1) need to center output around 0
-          (2) need to reduce so don't see both positive and negative parts of the mirrored spectrum
-          (3) consider if this will work for non-periodic data
+    Plot the one-sided magnitude spectrum from algo_dsp_spectrum.magnitude_spectrum,
+    up to freq_ratio of the way to fs/2. Use SpectrumAnalyzer for long or streamed signals.
     """
-    ft = np.fft.fft(sig)
-    magnitude_spectrum = np.abs(ft)
+    frequency, magnitude_spectrum = spectrum(sig, fs)
     plt.figure(figsize=(18,5))
-    frequency = np.linspace(0, fs//2, len(magnitude_spectrum))
     num_frequency_bins = int(len(frequency) * freq_ratio)
 
     plt.plot(frequency[:num_frequency_bins], magnitude_spectrum[:num_frequency_bins])
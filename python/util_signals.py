@@ -1,59 +1,76 @@
+from functools import lru_cache
+
 import numpy as np
 
 #####################################################
 #
 # Test signal functions from Will Pirkle's FX book
 #
+#    Any length, dtype and channel count; (channels, n) when channels > 1.
+#    Results are read-only - take a .copy() to get an array you can write to.
+#    Signals of up to CACHE_MAX_BYTES are cached, so asking for the same one
+#    again costs nothing; longer ones are built on every call, so the cache
+#    never holds more than CACHE_SIZE * CACHE_MAX_BYTES.
+#
 #####################################################
 
 
-def nyq():
-    # Nyquist - 500 samples
-    res = np.ones(500) * -1
-    res[::2] *= -1
-    return np.asarray(res)
-
-
-def half_nyq():
-    # Half Nyquist - 500 samples
-    res = []
-    for n in range(0, 125):
-        res.append(0)
-        res.append(1)
-        res.append(0)
-        res.append(-1)
-    return np.asarray(res)
-
-
-def qtr_nyq():
-    # Quarter Nyquist - 500 samples
-    res = []
-    for n in range(0, 62):
-        res.append(0)
-        res.append(0.707)
-        res.append(1)
-        res.append(0.707)
-        res.append(0)
-        res.append(-0.707)
-        res.append(-1)
-        res.append(-0.707)
-    # because 62 * 8 = 496, need to add four samples to make a list of 500
-    res.append(0)
-    res.append(0.707)
-    res.append(1)
-    res.append(0.707)
-    return np.asarray(res)
-
-
-def impls():
-    # Impulse - 500 samples
-    res = np.zeros(500)
-    res[1] = 1
-    return np.asarray(res)
-
-
-def step():
-    # Step function
-    res = np.ones(500)
-    res[0] = 0
-    return np.asarray(res)
+_PATTERNS = {
+    'nyq': [1.0, -1.0],
+    'half_nyq': [0.0, 1.0, 0.0, -1.0],
+    'qtr_nyq': [0.0, 0.707, 1.0, 0.707, 0.0, -0.707, -1.0, -0.707],
+}
+
+
+CACHE_SIZE = 32
+CACHE_MAX_BYTES = 1 << 20
+
+
+def _signal(kind, n, dtype, channels):
+    if n * dtype.itemsize > CACHE_MAX_BYTES:
+        return _build(kind, n, dtype, channels)
+    return _cached_signal(kind, n, dtype, channels)
+
+
+def _build(kind, n, dtype, channels):
+    if kind in _PATTERNS:
+        mono = np.resize(np.asarray(_PATTERNS[kind], dtype=dtype), n)
+    elif kind == 'impls':
+        mono = np.zeros(n, dtype=dtype)
+        mono[1:2] = 1
+    else:
+        mono = np.ones(n, dtype=dtype)
+        mono[0:1] = 0
+    mono.flags.writeable = False
+
+    if channels == 1:
+        return mono
+    return np.broadcast_to(mono, (channels, n))
+
+
+_cached_signal = lru_cache(maxsize=CACHE_SIZE)(_build)
+
+
+def nyq(n=500, dtype=np.float64, channels=1):
+    # Nyquist - 1, -1, 1, -1, ...
+    return _signal('nyq', n, np.dtype(dtype), channels)
+
+
+def half_nyq(n=500, dtype=np.float64, channels=1):
+    # Half Nyquist - 0, 1, 0, -1, ...
+    return _signal('half_nyq', n, np.dtype(dtype), channels)
+
+
+def qtr_nyq(n=500, dtype=np.float64, channels=1):
+    # Quarter Nyquist - 0, 0.707, 1, 0.707, 0, -0.707, -1, -0.707, ...
+    return _signal('qtr_nyq', n, np.dtype(dtype), channels)
+
+
+def impls(n=500, dtype=np.float64, channels=1):
+    # Impulse - a single 1 at sample 1
+    return _signal('impls', n, np.dtype(dtype), channels)
+
+
+def step(n=500, dtype=np.float64, channels=1):
+    # Step function - 0 then 1s
+    return _signal('step', n, np.dtype(dtype), channels)
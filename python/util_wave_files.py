@@ -1,36 +1,237 @@
 """
-TODO - below is the starting point for writing functions to handle things that may not be needed...
+Chunked WAV file reading and writing.
+
+Blocks are (n_channels, n_samples) float arrays scaled to [-1, 1), the layout the
+filters use. Reading memory-maps the data chunk and converts one block at a time,
+so files larger than RAM can be streamed; writing appends blocks and patches the
+RIFF/data sizes in the header on close.
 """
 
+import mmap
+import re
+import struct
+
 import numpy as np
-from scipy.io import wavfile
-import matplotlib.pyplot as plt
 
-duration = 3.0
-f0 = 220
-f1 = 360
-fs = 48000
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+# sample format name -> (format tag, bytes per sample, numpy storage type, full scale)
+SAMPLE_FORMATS = {
+    'int16': (WAVE_FORMAT_PCM, 2, '<i2', 2.0 ** 15),
+    'int24': (WAVE_FORMAT_PCM, 3, 'u1', 2.0 ** 23),
+    'int32': (WAVE_FORMAT_PCM, 4, '<i4', 2.0 ** 31),
+    'float32': (WAVE_FORMAT_IEEE_FLOAT, 4, '<f4', 1.0),
+}
+
+# data chunk sizes left by writers that stream and never patch their header
+STREAMING_SIZES = (0, 0xFFFFFFFF)
+# chunks that can follow the data chunk of such a file
+TRAILING_CHUNKS = (b'LIST', b'id3 ', b'ID3 ', b'cue ', b'smpl', b'inst', b'bext', b'acid', b'JUNK', b'PAD ')
+_TRAILING_CHUNK = re.compile(b'|'.join(re.escape(chunk_id) for chunk_id in TRAILING_CHUNKS))
+# the largest data chunk whose size, and the RIFF size around it, fit the 32-bit header fields
+MAX_DATA_BYTES = 0xFFFFFFFF - 36 - 1
+
+
+class WavInfo:
+    """ What the header of a WAV file says about its data chunk """
+    def __init__(self, fs, channels, sample_format, n_frames, data_offset):
+        self.fs = fs
+        self.channels = channels
+        self.sample_format = sample_format
+        self.n_frames = n_frames
+        self.data_offset = data_offset
+
+    def __str__(self):
+        return f"fs = {self.fs}, channels = {self.channels}, format = {self.sample_format}, frames = {self.n_frames}"
+
+
+def wav_info(path):
+    """ Walk the RIFF chunks of a WAV file up to its data chunk """
+    with open(path, 'rb') as f:
+        riff, _, wave = struct.unpack('<4sI4s', f.read(12))
+        if riff != b'RIFF' or wave != b'WAVE':
+            raise ValueError(f"{path} is not a RIFF/WAVE file")
+
+        fmt = None
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                raise ValueError(f"{path} has no data chunk")
+            chunk_id, size = struct.unpack('<4sI', header)
+
+            if chunk_id == b'fmt ':
+                fmt = f.read(size)
+                f.seek(size % 2, 1)
+            elif chunk_id == b'data':
+                data_offset = f.tell()
+                break
+            else:
+                f.seek(size + size % 2, 1)
+
+        f.seek(0, 2)
+        file_end = f.tell()
+
+    if fmt is None:
+        raise ValueError(f"{path} has no fmt chunk before its data chunk")
+
+    tag, channels, fs, _, _, bits = struct.unpack('<HHIIHH', fmt[:16])
+    if tag == WAVE_FORMAT_EXTENSIBLE:
+        tag = struct.unpack('<H', fmt[24:26])[0]
+
+    sample_format = {(WAVE_FORMAT_PCM, 16): 'int16', (WAVE_FORMAT_PCM, 24): 'int24',
+                     (WAVE_FORMAT_PCM, 32): 'int32', (WAVE_FORMAT_IEEE_FLOAT, 32): 'float32'}.get((tag, bits))
+    if sample_format is None:
+        raise ValueError(f"{path}: unsupported format tag {tag} with {bits} bits per sample")
+
+    frame_bytes = channels * SAMPLE_FORMATS[sample_format][1]
+    if size in STREAMING_SIZES:
+        size = _data_end(path, data_offset, file_end) - data_offset
+    else:
+        size = min(size, file_end - data_offset)  # a truncated file
+
+    return WavInfo(fs, channels, sample_format, size // frame_bytes, data_offset)
+
+
+def _data_end(path, start, end):
+    """ where the data of a streamed file stops: at the first TRAILING_CHUNKS id from which
+    well-formed chunks run exactly to the end of the file, otherwise at the end of the file """
+    if start >= end:
+        return end
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        # one pass over the data, which can be many GB
+        for match in _TRAILING_CHUNK.finditer(data, start):
+            if _chunks_reach(data, match.start(), end):
+                return match.start()
+    return end
+
+
+def _chunks_reach(data, position, end):
+    """ whether chunks starting at position follow one another up to end (the last pad byte may be missing) """
+    while position + 8 <= end:
+        chunk_id, size = struct.unpack('<4sI', data[position:position + 8])
+        if not all(32 <= c < 127 for c in chunk_id):
+            return False
+        position += 8 + size + size % 2
+    return position in (end, end + 1)
+
+
+def read_wav_blocks(path, block_size, dtype=np.float32):
+    """ Yield the file as (n_channels, block_size) blocks; the last one may be shorter
+    :param path: WAV file to read
+    :param block_size: frames per block
+    :param dtype: floating type of the yielded blocks
+    """
+    info = wav_info(path)
+    _, _, storage, full_scale = SAMPLE_FORMATS[info.sample_format]
+    if info.n_frames == 0:
+        return
+
+    if info.sample_format == 'int24':
+        shape = (info.n_frames, info.channels, 3)
+    else:
+        shape = (info.n_frames, info.channels)
+    data = np.memmap(path, dtype=storage, mode='r', offset=info.data_offset, shape=shape)
+
+    for start in range(0, info.n_frames, block_size):
+        frames = data[start:start + block_size]
+        if info.sample_format == 'int24':
+            frames = _int24_to_int32(frames)
+        block = np.array(frames.T, dtype=dtype, order='C')
+        if full_scale != 1.0:
+            block *= 1.0 / full_scale
+        yield block
+
+    del data
+
+
+def read_wav(path, dtype=np.float32):
+    """ The whole file as one (n_channels, n_samples) array, and its sample rate """
+    info = wav_info(path)
+    blocks = list(read_wav_blocks(path, max(info.n_frames, 1), dtype))
+    if not blocks:
+        return np.zeros((info.channels, 0), dtype=dtype), info.fs
+    return blocks[0], info.fs
+
+
+class WavWriter:
+    """
+    Streams blocks into a WAV file. The header is written with placeholder sizes
+    and patched on close, so the total length doesn't have to be known up front.
+    Data beyond MAX_DATA_BYTES (4 GiB) doesn't fit the 32-bit size fields, so such
+    files get the 0xFFFFFFFF streaming sizes, which wav_info reads to the end of the file.
+    Use it as a context manager, or call close().
+    """
+    def __init__(self, path, fs, channels, sample_format='int16'):
+        if sample_format not in SAMPLE_FORMATS:
+            raise ValueError(f"unknown sample format '{sample_format}', expected one of {list(SAMPLE_FORMATS)}")
+        self.path = path
+        self.fs = int(round(fs))  # resampling can hand over rates like 44100.0
+        self.channels = channels
+        self.sample_format = sample_format
+        self.n_frames = 0
+        self._file = open(path, 'wb')
+        self._write_header(0)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __str__(self):
+        return f"path = {self.path}, fs = {self.fs}, channels = {self.channels}, frames = {self.n_frames}"
+
+    def write(self, block):
+        """ append a (n_channels, n_samples) block, or a 1-D block for mono files """
+        block = np.asarray(block)
+        if block.ndim == 1:
+            block = block[np.newaxis, :]
+        if block.shape[0] != self.channels:
+            raise ValueError(f"block has {block.shape[0]} channels, file has {self.channels}")
 
-t = np.arange(0, duration, 1.0/float(fs))
-left = np.cos(2.0 * np.pi * f0 * t)
-right = np.cos(2.0 * np.pi * f1 * t)
+        full_scale = SAMPLE_FORMATS[self.sample_format][3]
+        frames = block.T
+        if self.sample_format == 'float32':
+            data = frames.astype('<f4')
+        else:
+            scaled = np.rint(frames * full_scale)
+            np.clip(scaled, -full_scale, full_scale - 1, out=scaled)
+            data = np.ascontiguousarray(scaled, dtype='<i4')
+            if self.sample_format == 'int16':
+                data = data.astype('<i2')
+            elif self.sample_format == 'int24':
+                data = data.view(np.uint8).reshape(data.shape + (4,))[..., :3]
 
-# make 2D array
-tone_y_stereo = np.vstack((left, right))
+        self._file.write(np.ascontiguousarray(data).tobytes())
+        self.n_frames += block.shape[1]
 
-# Reshape 2D array so that the left and right are in their respective columns
-tone_y_stereo = tone_y_stereo.transpose()
+    def close(self):
+        if self._file.closed:
+            return
+        try:
+            data_bytes = self.n_frames * self.channels * SAMPLE_FORMATS[self.sample_format][1]
+            if data_bytes % 2:
+                self._file.write(b'\x00')
+            self._file.seek(0)
+            self._write_header(data_bytes)
+        finally:
+            self._file.close()
 
-# write the stereo wave file
-wavfile.write('python/wave-files/stereoAudio.wav', fs, tone_y_stereo)
+    def _write_header(self, data_bytes):
+        tag, width, _, _ = SAMPLE_FORMATS[self.sample_format]
+        block_align = self.channels * width
+        riff_bytes = 36 + data_bytes + data_bytes % 2
+        if data_bytes > MAX_DATA_BYTES:
+            data_bytes = riff_bytes = 0xFFFFFFFF
+        self._file.write(struct.pack('<4sI4s', b'RIFF', riff_bytes, b'WAVE'))
+        self._file.write(struct.pack('<4sIHHIIHH', b'fmt ', 16, tag, self.channels, self.fs,
+                                     self.fs * block_align, block_align, width * 8))
+        self._file.write(struct.pack('<4sI', b'data', data_bytes))
 
-# read teh stereo wave file
-fs, data = wavfile.read('python/wave-files/stereoAudio.wav')
 
-#  plot the results
-plt.plot(t, data[:, 0], label="Left channel")
-plt.plot(t, data[:, 1], label="Right channel")
-plt.legend()
-plt.xlabel("Time [s]")
-plt.ylabel("Amplitude")
-plt.show()
+def _int24_to_int32(frames):
+    """ (..., 3) little-endian byte triplets to sign-extended int32 """
+    b = frames.astype(np.int32)
+    return ((b[..., 0] | (b[..., 1] << 8) | (b[..., 2] << 16)) << 8) >> 8
@@ -1,42 +1,64 @@
+from fractions import Fraction
+
 import numpy as np
-from scipy import signal
 
 #####################################################
 #
 # Test waveforms
-#    :param fs:   sample rate
-#    :param t:    time in seconds
-#    :param freq: desired frequency of waveform
+#    :param fs:    sample rate
+#    :param t:     time in seconds
+#    :param freq:  desired frequency of waveform
+#    :param dtype: output type, e.g. np.float32
+#    :param out:   optional array of _n_samples(fs, t) values to render into
+#                  (dtype is then ignored)
+#
+#    The phase of sample k is worked out exactly (as a fraction of a cycle) at
+#    the start of every block, so long renders don't drift; sawtooth, square
+#    and triangle follow scipy.signal's definitions.
 #
 #####################################################
 
+WAVEFORMS = ('sine', 'cosine', 'sawtooth', 'square', 'triangle')
+BLOCK_SIZE = 4096
+
 
-def wv_sine(fs, t, freq):
+def wv_sine(fs, t, freq, dtype=np.float64, out=None):
     """ an array of values representing a sine wave """
-    samples = np.arange(t * fs) / fs
-    out = np.sin(2 * np.pi * freq * samples)
-    return out
+    return _render_all('sine', fs, t, freq, dtype, out)
 
 
-def wv_cosine(fs, t, freq):
+def wv_cosine(fs, t, freq, dtype=np.float64, out=None):
     """ an array of values representing a cosine wave """
-    samples = np.arange(t * fs) / fs
-    out = np.cos(2 * np.pi * freq * samples)
-    return out
+    return _render_all('cosine', fs, t, freq, dtype, out)
 
 
-def wv_sawtooth(fs, t, freq):
+def wv_sawtooth(fs, t, freq, dtype=np.float64, out=None):
     """ an array of values representing a sawtooth wave """
-    samples = np.arange(t * fs) / fs
-    out = signal.sawtooth(2 * np.pi * freq * samples)
-    return out
+    return _render_all('sawtooth', fs, t, freq, dtype, out)
 
 
-def wv_square(fs, t, freq):
+def wv_square(fs, t, freq, dtype=np.float64, out=None):
     """ an array of values representing a square wave """
-    samples = np.arange(t * fs) / fs
-    out = signal.square(2 * np.pi * freq * samples)
-    return out
+    return _render_all('square', fs, t, freq, dtype, out)
+
+
+def wv_blocks(waveform, fs, t, freq, block_size=BLOCK_SIZE, dtype=np.float64, start=0, out=None):
+    """
+    Yield a waveform as consecutive blocks; the last one may be shorter
+    :param waveform: one of WAVEFORMS
+    :param t: time in seconds, or None to keep going
+    :param block_size: samples per block
+    :param start: sample to start from, e.g. to resume a render
+    :param out: optional (block_size,) array every block is rendered into; each
+                block then overwrites the one before, and nothing is allocated
+    """
+    if waveform not in WAVEFORMS:
+        raise ValueError(f"unknown waveform '{waveform}', expected one of {WAVEFORMS}")
+    n_samples = None if t is None else _n_samples(fs, t)
+    while n_samples is None or start < n_samples:
+        n = block_size if n_samples is None else min(block_size, n_samples - start)
+        yield _render(waveform, fs, freq, start, np.empty(n, dtype=dtype) if out is None else out[:n])
+        start += n
 
 
 #####################################################
@@ -45,11 +67,9 @@ def wv_square(fs, t, freq):
 #
 #####################################################
 
-def wv_triangle(fs, t, freq):
-    """ using scipy's saw, width=0.5 is a triangle """
-    samples = np.arange(t * fs) / fs
-    out = signal.sawtooth(2 * np.pi * freq * samples, 0.5)
-    return out
+def wv_triangle(fs, t, freq, dtype=np.float64, out=None):
+    """ scipy's saw with width=0.5 is a triangle """
+    return _render_all('triangle', fs, t, freq, dtype, out)
 
 
 def two_sines(fs, f1, f2, mag1, mag2, time):
@@ -72,3 +92,41 @@ def two_sines(fs, f1, f2, mag1, mag2, time):
     y_hat = np.fft.fft(y)
     f_cycles = np.fft.fftfreq(len(t), d=1.0 / fs)  # the frequencies in cycles
     return t, y, y_hat, f_cycles
+
+
+def _n_samples(fs, t):
+    """ same length as np.arange(t * fs) """
+    return len(range(0, int(np.ceil(t * fs))))
+
+
+def _render_all(waveform, fs, t, freq, dtype, out=None):
+    """ whole waveform, filled a block at a time to keep the temporaries small """
+    if out is None:
+        out = np.empty(_n_samples(fs, t), dtype=dtype)
+    elif len(out) != _n_samples(fs, t):
+        raise ValueError(f"out holds {len(out)} samples, the waveform has {_n_samples(fs, t)}")
+    for start in range(0, len(out), BLOCK_SIZE):
+        _render(waveform, fs, freq, start, out[start:start + BLOCK_SIZE])
+    return out
+
+
+def _render(waveform, fs, freq, start, out):
+    """ fill out with the waveform from sample start on """
+    cycles = float(Fraction(float(freq)) * start / Fraction(fs) % 1)
+    phase = np.arange(len(out), dtype=np.float64)
+    phase *= float(freq) / fs
+    phase += cycles
+    np.mod(phase, 1.0, out=phase)
+
+    if waveform == 'sine':
+        np.sin(2 * np.pi * phase, out=out)
+    elif waveform == 'cosine':
+        np.cos(2 * np.pi * phase, out=out)
+    elif waveform == 'sawtooth':
+        np.multiply(phase, 2.0, out=out)
+        out -= 1.0
+    elif waveform == 'square':
+        np.copyto(out, np.where(phase < 0.5, 1.0, -1.0))
+    else:
+        np.copyto(out, np.where(phase < 0.5, 4.0 * phase - 1.0, 3.0 - 4.0 * phase))
+    return out